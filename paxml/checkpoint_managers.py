@@ -81,19 +81,21 @@ def _create_items_dict_with_metadata(
     train_state,
     train_state_unpadded_shape_dtype_struct,
     version,
-    tensorstore_use_ocdbt: Optional[bool] = None
+    tensorstore_use_ocdbt: Optional[bool] = None,
+    metadata: Optional[Mapping[str, Any]] = None,
 ):
-  """Returns items dict with metadata."""
+  """Returns items dict with metadata, made unless `metadata` is given."""
   # (padded) train_state
   items = {STATE_ITEM_NAME: train_state}
 
   if version > 0:
-    metadata = checkpoint_metadata.make_metadata(
-        version,
-        train_state,
-        train_state_unpadded_shape_dtype_struct,
-        tensorstore_use_ocdbt=tensorstore_use_ocdbt,
-    )
+    if metadata is None:
+      metadata = checkpoint_metadata.make_metadata(
+          version,
+          train_state,
+          train_state_unpadded_shape_dtype_struct,
+          tensorstore_use_ocdbt=tensorstore_use_ocdbt,
+      )
     items.update({METADATA_ITEM_NAME: metadata})
 
   return items
@@ -332,6 +334,8 @@ class OrbaxCheckpointManager:
       tensorstore_use_ocdbt: Optional[bool] = None,
   ):
     self._tensorstore_use_ocdbt = tensorstore_use_ocdbt
+    # (unpadded shapes, metadata) of the last save.
+    self._save_metadata_cache = None
     checkpointers = {
         STATE_ITEM_NAME: checkpointer,
         METADATA_ITEM_NAME: orbax.checkpoint.Checkpointer(
@@ -372,6 +376,11 @@ class OrbaxCheckpointManager:
   def wait_until_finished(self):
     self._manager.wait_until_finished()
 
+  def save_in_progress(self) -> bool:
+    """Returns whether a previous asynchronous save is still being written."""
+    finalize_thread = self._manager._finalize_thread  # pylint: disable=protected-access
+    return finalize_thread is not None and finalize_thread.is_alive()
+
   def reached_preemption(self, step: int) -> bool:
     return self._manager.reached_preemption(step)
 
@@ -410,6 +419,9 @@ class OrbaxCheckpointManager:
         train_state_unpadded_shape_dtype_struct,
         self.version,
         tensorstore_use_ocdbt=self._tensorstore_use_ocdbt,
+        metadata=self._get_save_metadata(
+            train_state, train_state_unpadded_shape_dtype_struct
+        ),
     )
 
     if train_input_pipeline:
@@ -417,6 +429,48 @@ class OrbaxCheckpointManager:
 
     return self._manager.save(step, items, save_kwargs=save_kwargs, force=force)
 
+  def _get_save_metadata(
+      self,
+      train_state: Any,
+      train_state_unpadded_shape_dtype_struct: OptionalNestedShapeDtypeStruct,
+  ) -> Optional[Mapping[str, Any]]:
+    """Returns the checkpoint metadata to save along with `train_state`.
+
+    The metadata only depends on the shapes and dtypes of the train state. The
+    training loop passes the same unpadded shapes, whose padded counterparts
+    are fixed, to every save of a run, so the metadata of the previous save is
+    reused when they are the same object. Comparing the shapes themselves
+    would cost as much as making the metadata again.
+
+    Args:
+      train_state: The (padded) train state to save.
+      train_state_unpadded_shape_dtype_struct: The unpadded shapes and dtypes.
+
+    Returns:
+      The metadata, or None if the checkpoint version has none.
+    """
+    if self.version <= 0:
+      return None
+    if (
+        train_state_unpadded_shape_dtype_struct is not None
+        and self._save_metadata_cache is not None
+        and self._save_metadata_cache[0]
+        is train_state_unpadded_shape_dtype_struct
+    ):
+      return self._save_metadata_cache[1]
+    metadata = checkpoint_metadata.make_metadata(
+        self.version,
+        train_state,
+        train_state_unpadded_shape_dtype_struct,
+        tensorstore_use_ocdbt=self._tensorstore_use_ocdbt,
+    )
+    if train_state_unpadded_shape_dtype_struct is not None:
+      self._save_metadata_cache = (
+          train_state_unpadded_shape_dtype_struct,
+          metadata,
+      )
+    return metadata
+
   def restore(
       self,
       step: int,
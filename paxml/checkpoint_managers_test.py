@@ -707,6 +707,38 @@ class CheckpointManagerTest(parameterized.TestCase):
     )
     self.assertSameElements(saved_steps, checkpoint_manager.all_steps())
 
+  def test_save_reuses_metadata(self):
+    options = checkpoint_managers.CheckpointManagerOptions(
+        save_interval_steps=1
+    )
+    checkpoint_manager = self.create_checkpoint_manager(options)
+
+    with mock.patch.object(
+        checkpoint_managers.checkpoint_metadata,
+        'make_metadata',
+        wraps=checkpoint_managers.checkpoint_metadata.make_metadata,
+    ) as make_metadata:
+      for step in range(2):
+        self.save(
+            checkpoint_manager,
+            step,
+            self.train_state,
+            train_state_unpadded_shape_dtype_struct=self.train_state_unpadded_shape_dtype_struct,
+        )
+      make_metadata.assert_called_once()
+      # Metadata is made again for different unpadded shapes.
+      self.save(
+          checkpoint_manager,
+          2,
+          self.train_state,
+          train_state_unpadded_shape_dtype_struct=jax.tree_util.tree_map(
+              lambda x: x, self.train_state_unpadded_shape_dtype_struct
+          ),
+      )
+      self.assertEqual(2, make_metadata.call_count)
+
+    self.assertSameElements([0, 1, 2], checkpoint_manager.all_steps())
+
   def test_cleanup(self):
     def _fake_on_commit_callback(*args, **kwargs):
       del args, kwargs
@@ -80,6 +80,11 @@ PMAP_PARALLEL_AXIS_NAME = base_layer.PMAP_PARALLEL_AXIS_NAME
 PRNGKey = pytypes.PRNGKey
 NestedShapeDtypeLike = pytypes.NestedShapeDtypeLike
 NO_PREFIX_KEY = optimizer_prefix_vectorization.NO_PREFIX_KEY
+# A partitioned decode step, as returned by `Partitioner.partition()`.
+SpmdDecodeStep = Callable[
+    [TrainState, PRNGKey, NestedJTensor, Optional[int]],
+    Tuple[Tuple[NestedMap, NestedMap], NestedMap],
+]
 
 
 def _get_dir_names(
@@ -967,12 +972,7 @@ class SingleTaskDecodeProgram(programs.Program):
       task_p: Optional[pax_fiddle.Config[tasks_lib.SingleTask]],
       output_pickle: bool,
       enable_checkpoint_saving: bool,
-      spmd_decode_step: Optional[
-          Callable[
-              [TrainState, PRNGKey, NestedJTensor, Optional[int]],
-              Tuple[Tuple[NestedMap, NestedMap], NestedMap],
-          ]
-      ],
+      spmd_decode_step: Optional[SpmdDecodeStep],
       inputs_partition_spec: Optional[NestedPartitionSpec],
       metrics_p: pax_fiddle.Config[base_metrics.BaseMetrics],
   ) -> None:
@@ -1381,13 +1381,11 @@ def partitioned_decode_once(
     output_pickle: bool = True,
     enable_checkpoint_saving: bool = True,
     # TODO(wangpeng): Remove this argument.
-    spmd_decode_step: Optional[
-        Callable[
-            [TrainState, PRNGKey, NestedJTensor, Optional[int]],
-            Tuple[Tuple[NestedMap, NestedMap], NestedMap],
-        ]
-    ] = None,
+    spmd_decode_step: Optional[SpmdDecodeStep] = None,
     inputs_partition_spec: Optional[NestedPartitionSpec] = None,
+    spmd_decode_steps: Optional[
+        Sequence[Tuple[SpmdDecodeStep, Optional[NestedPartitionSpec]]]
+    ] = None,
 ) -> Callable[[TrainState, List[SummaryWriter]], tuning_lib.DecodeMetrics]:
   """Returns a function that runs decode over all decoder datasets.
 
@@ -1405,6 +1403,10 @@ def partitioned_decode_once(
     enable_checkpoint_saving: Whether to perform checkpoint saving or not.
     spmd_decode_step: pjit'ed decode function.
     inputs_partition_spec: Partition specs for inputs.
+    spmd_decode_steps: Optional (pjit'ed decode function, partition specs for
+      inputs) pairs, one per decode program. Takes precedence over
+      `spmd_decode_step` and `inputs_partition_spec` when set, which allows
+      decode inputs with different shapes.
   """
 
   def decode_once_fn(partitioned_train_state, summary_writers):
@@ -1433,6 +1435,7 @@ def partitioned_decode_once(
           enable_checkpoint_saving=enable_checkpoint_saving,
           spmd_decode_step=spmd_decode_step,
           inputs_partition_spec=inputs_partition_spec,
+          spmd_decode_steps=spmd_decode_steps,
           metrics_p=task_p.metrics,
       )
     decode_steps_per_sec = sum(num_decode_steps) / decode_period.elapsed
@@ -1459,13 +1462,11 @@ def _decode_once(
     var_weight_params: Optional[NestedWeightHParams] = None,
     output_pickle: bool = True,
     enable_checkpoint_saving: bool = True,
-    spmd_decode_step: Optional[
-        Callable[
-            [TrainState, PRNGKey, NestedJTensor, Optional[int]],
-            Tuple[Tuple[NestedMap, NestedMap], NestedMap],
-        ]
-    ] = None,
+    spmd_decode_step: Optional[SpmdDecodeStep] = None,
     inputs_partition_spec: Optional[NestedPartitionSpec] = None,
+    spmd_decode_steps: Optional[
+        Sequence[Tuple[SpmdDecodeStep, Optional[NestedPartitionSpec]]]
+    ] = None,
     metrics_p: Optional[pax_fiddle.Config[base_metrics.BaseMetrics]] = None,
 ) -> Tuple[
     Tuple[
@@ -1494,6 +1495,9 @@ def _decode_once(
     enable_checkpoint_saving: Whether to perform checkpoint saving or not.
     spmd_decode_step: pjit'ed decode function.
     inputs_partition_spec: Partition specs for inputs.
+    spmd_decode_steps: Optional (pjit'ed decode function, partition specs for
+      inputs) pairs, one per decode program. Takes precedence over
+      `spmd_decode_step` and `inputs_partition_spec` when set.
     metrics_p: Parameters to configure how to aggregate the metrics.
 
   Returns:
@@ -1608,6 +1612,11 @@ def _decode_once(
   raw_metrics_list = []
 
   for i, decode_program in enumerate(decode_programs):
+    if spmd_decode_steps is not None:
+      program_decode_step, program_partition_spec = spmd_decode_steps[i]
+    else:
+      program_decode_step = spmd_decode_step
+      program_partition_spec = inputs_partition_spec
     decode_program.setup(
         prng_key=prng_key,
         job_log_dir=job_log_dir,
@@ -1617,8 +1626,8 @@ def _decode_once(
         task_p=task_p,
         output_pickle=output_pickle,
         enable_checkpoint_saving=enable_checkpoint_saving,
-        spmd_decode_step=spmd_decode_step,
-        inputs_partition_spec=inputs_partition_spec,
+        spmd_decode_step=program_decode_step,
+        inputs_partition_spec=program_partition_spec,
         metrics_p=metrics_p,
     )
     decode_output = decode_program.run(train_state, step_i).aux
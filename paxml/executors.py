@@ -15,8 +15,8 @@
 
 """Implementations of program executors."""
 
+import concurrent.futures
 import contextlib
-import functools
 import gc
 from typing import Any, Callable, Optional, Sequence, Tuple
 
@@ -55,7 +55,8 @@ def _maybe_update_latest_model_step(
     task_p: pax_fiddle.Config[tasks_lib.SingleTask],
 ) -> None:
   """Updates `train_input_p` in place its latest model step."""
-  if not hasattr(train_input_p, 'deterministic_input_start_index'):
+  dp = getattr(train_input_p, 'deterministic_input_start_index', None)
+  if dp is None:
     # Not deterministic seqio.
     return
   logging.info(f'step used for deterministic seqio: {initial_global_step}')
@@ -69,37 +70,107 @@ def _maybe_update_latest_model_step(
     # to restore in this case and it'll train from step 0, so no need to update.
     return
   logging.info('Updating _latest_model_step for training input.')
-  dp = train_input_p.deterministic_input_start_index
   dp._latest_model_step = (
       initial_global_step  # pylint: disable=protected-access
   )
 
 
+@jax.jit
+def _split_prng_keys(root_prng_key):
+  """Splits the root key into (prng_key, train, eval, decode) keys.
+
+  The keys are the same as those from successive `jax.random.split()` calls,
+  but computed by a single dispatch.
+
+  Args:
+    root_prng_key: The root prng key.
+
+  Returns:
+    A tuple (prng_key, train_prng_seed, eval_prng_seed, decode_prng_seed).
+  """
+  prng_key, train_prng_seed, eval_prng_seed = jax.random.split(root_prng_key, 3)
+  prng_key, decode_prng_seed = jax.random.split(prng_key, 2)
+  return prng_key, train_prng_seed, eval_prng_seed, decode_prng_seed
+
+
+def _next_interval_step(step: int, interval_steps: Optional[int]) -> int:
+  """Returns the first multiple of `interval_steps` strictly after `step`.
+
+  Args:
+    step: The current step.
+    interval_steps: The interval in number of steps. None or a non-positive
+      value means the interval is disabled.
+
+  Returns:
+    The next step to trigger at, or -1 if the interval is disabled.
+  """
+  if interval_steps is None or interval_steps <= 0:
+    return -1
+  return (step // interval_steps + 1) * interval_steps
+
+
+def _shape_dtype_signature(tree: Any) -> Any:
+  """Returns a hashable signature of the structure, shapes and dtypes."""
+  leaves, treedef = jax.tree_util.tree_flatten(tree)
+  return treedef, tuple((x.shape, x.dtype) for x in leaves)
+
+
+@contextlib.contextmanager
+def _frozen_gc(disable_automatic_gc: bool):
+  """Collects then freezes GC objects, and undoes it on exit.
+
+  Args:
+    disable_automatic_gc: Whether to also disable automatic collections until
+      exit. They are re-enabled on exit only if they were enabled on entry.
+
+  Yields:
+    None.
+  """
+  was_enabled = gc.isenabled()
+  gc.collect()
+  gc.freeze()
+  if disable_automatic_gc:
+    gc.disable()
+  try:
+    yield
+  finally:
+    if was_enabled:
+      gc.enable()
+    gc.unfreeze()
+
+
 class _DecodeSummaryWriters(contextlib.ExitStack):
   """Manage decode summary writers."""
 
   _exit_callbacks = []
 
   def __init__(
-      self, job_log_dir: epath.Path, decode_input_names: Sequence[str]
+      self,
+      job_log_dir: epath.Path,
+      decode_programs: Sequence[eval_lib.SingleTaskDecodeProgram],
   ):
     """Initialize context manager.
 
     Args:
       job_log_dir: Directory for the job logs.
-      decode_input_names: list of names for the decode input pipelines.
+      decode_programs: list of decode programs, one summary writer is created
+        for each of their decode input pipelines.
     """
     super().__init__()
     self.summary_decode_dirs = [
-        job_log_dir / 'summaries' / f'decode_test_{name}'
-        for name in decode_input_names
+        job_log_dir / 'summaries' / f'decode_test_{p.decode_input.name}'
+        for p in decode_programs
     ]
 
   def __enter__(self) -> Sequence[SummaryWriter]:
-    self.decode_summary_writers = [
-        self.enter_context(summary_utils.get_summary_writer(d))
-        for d in self.summary_decode_dirs
-    ]
+    try:
+      self.decode_summary_writers = summary_utils.enter_summary_writers(
+          self, self.summary_decode_dirs
+      )
+    except BaseException:
+      # __exit__() is not called when __enter__() raises.
+      self.close()
+      raise
     return self.decode_summary_writers
 
 
@@ -121,12 +192,15 @@ class DefaultExecutor(base_executor.BaseExecutor):
 
     # States to lazily initialize in .setup().
     self._train_input_pipeline = None
+    self._train_input_prefetch: Optional[concurrent.futures.Future] = None
     self._partitioned_train_state = None
     self._train_state_provenance = None
+    self._train_state_metadata = None
     self._total_num_params = None
     self._prng_key = None
     self._train_prng_seed = None
     self._eval_prng_seed = None
+    self._decode_prng_seed = None
 
   def _maybe_create_train_input(
       self,
@@ -204,6 +278,24 @@ class DefaultExecutor(base_executor.BaseExecutor):
         )
     )
 
+    # Starts filling the train input pipeline in the background, so that it
+    # overlaps with the partitioner setup and the checkpoint restore below. The
+    # prefetched batch is kept by peek_padded() and consumed by the first
+    # get_next_padded() of the train program. This is only safe when nothing
+    # else reads from the pipeline until the training loop starts.
+    if (
+        task_p.train.eager_input_prefetch
+        and train_input_for_partitioner is None
+        and train_input_for_checkpoint is None
+    ):
+      prefetch_pool = concurrent.futures.ThreadPoolExecutor(
+          max_workers=1, thread_name_prefix='TrainInputPrefetch'
+      )
+      self._train_input_prefetch = prefetch_pool.submit(
+          train_input.peek_padded
+      )
+      prefetch_pool.shutdown(wait=False)
+
     # Sets up the partitioner. Note it only needs shape/dtype information of the
     # prng key.
     # TODO(laigd): let it take ShapeDtypeStruct of prng key instead.
@@ -253,8 +345,8 @@ class DefaultExecutor(base_executor.BaseExecutor):
       )
 
     # Splits the key.
-    prng_key, train_prng_seed, eval_prng_seed = jax.random.split(
-        root_prng_key, 3
+    prng_key, train_prng_seed, eval_prng_seed, decode_prng_seed = (
+        _split_prng_keys(root_prng_key)
     )
     logging.info('train prng seed: %s', train_prng_seed)
     logging.info('eval prng seed: %s', eval_prng_seed)
@@ -265,21 +357,41 @@ class DefaultExecutor(base_executor.BaseExecutor):
     self._train_input_pipeline = train_input
     self._partitioned_train_state = partitioned_train_state
     self._train_state_provenance = train_state_provenance
+    self._train_state_metadata = train_state_metadata
     self._total_num_params = total_num_params
     self._prng_key = prng_key
     self._train_prng_seed = train_prng_seed
     self._eval_prng_seed = eval_prng_seed
+    self._decode_prng_seed = decode_prng_seed
 
   def _create_decode_programs(self, decode_input_params):
     # TODO(wangpeng): Make decode programs configurable.
-    create_decode_program = functools.partial(
-        eval_lib.SingleTaskDecodeProgram,
-        model=self._task.model,
-        partitioner=self._partitioner,
-    )
+    model = self._task.model
+    partitioner = self._partitioner
+    decode_input_params = [
+        partitioner.preprocess_input_config(p) for p in decode_input_params
+    ]
+    # Instantiating an input pipeline is mostly spent opening its data files,
+    # so multiple decode inputs may be instantiated concurrently.
+    if (
+        self._task.hparams.train.concurrent_decode_input_setup
+        and len(decode_input_params) > 1
+    ):
+      with concurrent.futures.ThreadPoolExecutor(
+          max_workers=min(8, len(decode_input_params)),
+          thread_name_prefix='DecodeInputSetup',
+      ) as pool:
+        decode_inputs = list(pool.map(instantiate, decode_input_params))
+    else:
+      decode_inputs = [instantiate(p) for p in decode_input_params]
     decode_programs = [
-        create_decode_program(decode_input=instantiate(p), input_index=i)
-        for i, p in enumerate(decode_input_params)
+        eval_lib.SingleTaskDecodeProgram(
+            model=model,
+            partitioner=partitioner,
+            decode_input=decode_input,
+            input_index=i,
+        )
+        for i, decode_input in enumerate(decode_inputs)
     ]
     trainer_lib.check_unique_names([p.decode_input for p in decode_programs])
     return decode_programs
@@ -291,46 +403,54 @@ class DefaultExecutor(base_executor.BaseExecutor):
   ) -> Tuple[
       Callable[..., tuning_lib.DecodeMetrics],
       jax.random.KeyArray,
-      Sequence[str],
+      Sequence[eval_lib.SingleTaskDecodeProgram],
   ]:
     use_pmap = self._task.model.ici_mesh_shape is None
 
     assert decode_input_ps, 'decode_input_p must not be empty'
 
-    prng_key, decode_key = jax.random.split(prng_key, 2)
+    # The decode key was already split from the root key in .setup().
+    decode_key = self._decode_prng_seed
     logging.info(
         'decode %s: %s', 'prng_seed' if use_pmap else 'prng_key', decode_key
     )
     decode_key = self._partitioner.preprocess_prng_key(decode_key)
 
-    preprocessed_decode_input_ps = [
-        self._partitioner.preprocess_input_config(input_p)
-        for input_p in decode_input_ps
-    ]
-
-    decode_programs = self._create_decode_programs(preprocessed_decode_input_ps)
+    decode_programs = self._create_decode_programs(decode_input_ps)
 
     if use_pmap:
-      var_weight_params = (
-          self._partitioner.get_train_state_metadata().var_weight_hparams
-      )
+      var_weight_params = self._train_state_metadata.var_weight_hparams
       spmd_decode_step = None
       decode_input_partition_spec = None
+      spmd_decode_steps = None
     else:
       var_weight_params = None
 
-      _, decode_inputs_shape_dtype = trainer_lib.get_inputs_shape_dtype(
-          preprocessed_decode_input_ps[0]
-      )
-
       # TODO(pax-dev): Support auto-sharding for decoder step.
       step_fn, is_eval = partitioning.get_step_fn(RunningMode.DECODE)
       assert is_eval
-      spmd_decode_step, decode_input_partition_spec = (
-          self._partitioner.partition(
+      # Partitions the decode step once per distinct input shape/dtype
+      # signature, since decode inputs are not required to share shapes.
+      partitioned_steps = {}
+      spmd_decode_steps = []
+      for decode_program in decode_programs:
+        # Peek to avoid exhausting the input pipeline.
+        decode_inputs_shape_dtype = jax.tree_map(
+            py_utils.get_global_input_shape_dtype,
+            decode_program.decode_input.peek_padded(),
+        )
+        signature = _shape_dtype_signature(decode_inputs_shape_dtype)
+        if signature not in partitioned_steps:
+          partitioned_steps[signature] = self._partitioner.partition(
               step_fn, decode_inputs_shape_dtype, is_eval
           )
-      )
+        spmd_decode_steps.append(partitioned_steps[signature])
+      if len(partitioned_steps) == 1:
+        spmd_decode_step, decode_input_partition_spec = spmd_decode_steps[0]
+        spmd_decode_steps = None
+      else:
+        spmd_decode_step = None
+        decode_input_partition_spec = None
 
     decode_once_fn = eval_lib.partitioned_decode_once(
         decode_programs=decode_programs,
@@ -341,12 +461,17 @@ class DefaultExecutor(base_executor.BaseExecutor):
         var_weight_params=var_weight_params,
         spmd_decode_step=spmd_decode_step,
         inputs_partition_spec=decode_input_partition_spec,
+        spmd_decode_steps=spmd_decode_steps,
     )
 
-    decode_input_names = [p.decode_input.name for p in decode_programs]
-    return decode_once_fn, prng_key, decode_input_names
+    return decode_once_fn, prng_key, decode_programs
 
   def start(self):
+    if self._train_input_prefetch is not None:
+      # Surfaces any error from the eager prefetch before training starts.
+      self._train_input_prefetch.result()
+      self._train_input_prefetch = None
+
     is_vars_replicated = self._task.model.ici_mesh_shape is None
     _train_and_evaluate_common(
         self._task,
@@ -355,6 +480,7 @@ class DefaultExecutor(base_executor.BaseExecutor):
         self._train_input_pipeline,
         self._partitioned_train_state,
         self._train_state_provenance,
+        self._train_state_metadata,
         self._prng_key,
         self._eval_programs,
         self._decode_input_ps,
@@ -370,9 +496,12 @@ class DefaultExecutor(base_executor.BaseExecutor):
     )
 
     # Shutdown the programs and run necessary cleanup.
-    self._train_program.shutdown()
-    for program in self._eval_programs:
-      program.shutdown()
+    try:
+      self._train_program.shutdown()
+      for program in self._eval_programs:
+        program.shutdown()
+    finally:
+      self._checkpointer.wait_until_finished()
 
 
 def _train_and_evaluate_common(
@@ -382,6 +511,7 @@ def _train_and_evaluate_common(
     train_input: base_input.BaseInput,
     partitioned_train_state: TrainState,
     train_state_provenance: TrainStateProvenance,
+    train_state_metadata: trainer_lib.TrainStateMetadata,
     prng_key,
     # TODO(hthu): Take a more generalized form of EvalProgram interface.
     eval_programs: Sequence[programs.BaseEvalProgram],
@@ -399,18 +529,23 @@ def _train_and_evaluate_common(
   """Training loop code common to both pmap and spmd."""
   task_p = task.hparams
   train_p = task_p.train
-  train_state_metadata = partitioner.get_train_state_metadata()
+  train_state_unpadded_shapes = train_state_metadata.unpadded_global_shapes
+  train_state_partition_specs = train_state_metadata.partition_specs
   train_input_for_checkpoint = (
       train_input if train_p.enable_input_checkpointing else None
   )
 
   if decode_input_p:
-    decode_once_fn, prng_key, decode_input_names = partition_decode_once_fns(
+    decode_once_fn, prng_key, decode_programs = partition_decode_once_fns(
         prng_key, decode_input_p
     )
   else:
-    decode_input_names = []
+    decode_programs = []
 
+  # From here on `step_i` is the host-side step counter, advanced from the train
+  # program's output. The loop itself must not read the step of
+  # `partitioned_train_state`, as that would block on the in-flight train step;
+  # the train program only reads it back when it syncs with the device.
   initial_global_step = int(
       py_utils.maybe_unreplicate_for_fully_replicated(
           partitioned_train_state.step
@@ -425,7 +560,7 @@ def _train_and_evaluate_common(
 
   logging.info('Training loop starting...')
   with _DecodeSummaryWriters(
-      job_log_dir, decode_input_names
+      job_log_dir, decode_programs
   ) as decode_summary_writers:
     step_i = initial_global_step
 
@@ -439,169 +574,269 @@ def _train_and_evaluate_common(
         eval_prng_seed,
         step_i,
     )
-    for program in eval_programs:
-      program.setup(task, partitioner, job_log_dir, eval_prng_seed)
-    trainer_lib.check_unique_names([prog.eval_input for prog in eval_programs])
+    # Eval programs are independent of each other and their setup is mostly
+    # spent instantiating input pipelines and opening summary writers, so they
+    # may be set up concurrently. If requested, this overlaps with training and
+    # is only waited for at the first eval.
+    eval_setup_futures = []
+    if eval_programs and train_p.background_eval_program_setup:
+      eval_setup_pool = concurrent.futures.ThreadPoolExecutor(
+          max_workers=min(8, len(eval_programs)),
+          thread_name_prefix='EvalProgramSetup',
+      )
+      eval_setup_futures = [
+          eval_setup_pool.submit(
+              program.setup, task, partitioner, job_log_dir, eval_prng_seed
+          )
+          for program in eval_programs
+      ]
+      eval_setup_pool.shutdown(wait=False)
+    elif train_p.concurrent_eval_program_setup and len(eval_programs) > 1:
+      with concurrent.futures.ThreadPoolExecutor(
+          max_workers=min(8, len(eval_programs)),
+          thread_name_prefix='EvalProgramSetup',
+      ) as pool:
+        futures = [
+            pool.submit(
+                program.setup, task, partitioner, job_log_dir, eval_prng_seed
+            )
+            for program in eval_programs
+        ]
+      for future in futures:
+        future.result()
+    else:
+      for program in eval_programs:
+        program.setup(task, partitioner, job_log_dir, eval_prng_seed)
+    if not eval_setup_futures:
+      trainer_lib.check_unique_names(
+          [prog.eval_input for prog in eval_programs]
+      )
 
     train_summary_writer = train_program.summary_writer
     # This only prints the view from the first host machine.
+    # The summaries are flushed together below, as each flush may be a
+    # roundtrip to a remote file system.
     summary_utils.write_model_structure(
-        train_summary_writer, partitioned_train_state, is_vars_replicated
+        train_summary_writer,
+        partitioned_train_state,
+        is_vars_replicated,
+        flush=False,
     )
     # train_state_provenance is None when model restored from checkpoint
     if train_state_provenance:
       summary_utils.write_model_provenance(
-          train_summary_writer, train_state_provenance
+          train_summary_writer, train_state_provenance, flush=False
       )
-    summary_utils.write_total_num_params(train_summary_writer, total_num_params)
+    summary_utils.write_total_num_params(
+        train_summary_writer, total_num_params, flush=False
+    )
     summary_utils.write_global_batch_size(
-        train_summary_writer, train_program.train_unpadded_global_batch_size
+        train_summary_writer,
+        train_program.train_unpadded_global_batch_size,
+        flush=False,
     )
+    train_summary_writer.flush()
 
     # Start the train loop. Make sure all at the same step.
-    py_utils.sync_global_devices(f'Start training loop from step: {step_i}')
+    # A single process has no peers to wait for.
+    if jax.process_count() > 1:
+      py_utils.sync_global_devices(f'Start training loop from step: {step_i}')
+    manual_gc_interval_steps = train_p.manual_gc_interval_steps
+    next_gc_step = _next_interval_step(step_i, manual_gc_interval_steps)
+    # The first train step traces and compiles the step function, which fills
+    # JAX's long-lived caches. With manual GC, these are frozen as well after
+    # that step, and unfrozen with the rest when the loop exits.
+    refreeze_gc = next_gc_step >= 0
+    # Loop invariants, hoisted so that the loop below only compares ints.
+    num_train_steps = train_p.num_train_steps
+    eval_interval_steps = train_p.eval_interval_steps
+    decode_interval_steps = train_p.decode_interval_steps
+    save_interval_steps = train_p.save_interval_steps
+    decode_use_ema_states = train_p.decode_use_ema_states
+    if decode_input_p and decode_use_ema_states and not tasks_lib.has_ema(
+        task_p
+    ):
+      raise ValueError(
+          'decode_use_ema_states is requested but the '
+          'learner does not seem to have ema enabled'
+      )
+    next_eval_step = _next_interval_step(step_i, eval_interval_steps)
+    next_decode_step = (
+        _next_interval_step(step_i, decode_interval_steps)
+        if decode_input_p
+        else -1
+    )
+    train_to_end = getattr(early_stopping_fn, 'train_to_end', False)
+    # Checked once, so that the per-step debug logs cost a bool test when off.
+    log_steps = logging.level_debug()
+    # The running modes reported to early stopping, keyed by
+    # (has_eval_metrics, has_decode_metrics).
+    running_modes = {
+        (has_eval, has_decode): RunningMode.detect(
+            has_train_metrics=True,
+            has_eval_metrics=has_eval,
+            has_decode_metrics=has_decode,
+        )
+        for has_eval in (False, True)
+        for has_decode in (False, True)
+    }
     # Collect then freeze GC, so that GC in the training loop will not touch the
     # python objects used to initialize the model. Unfreeze at the end of the
-    # loop.
-    gc.collect()
-    gc.freeze()
-    while True:
-      logging.debug('step=`%d`: Beginning', step_i)
-      checkpointer.save_if_needed(
-          step_i,
-          partitioned_train_state,
-          train_state_metadata.unpadded_global_shapes,
-          train_state_metadata.partition_specs,
-          train_input_for_checkpoint,
-      )
-      if exit_after_ondemand_checkpoint and checkpointer.reached_preemption(
-          step_i
-      ):
-        checkpointer.wait_until_finished()
-        exit(1)
-
-      if not train_program.should_run(partitioned_train_state, step_i):
-        logging.info(
-            (
-                'Training loop completed (step (`%d`) greater than '
-                'num_train_step (`%d`).'
-            ),
+    # loop, even if it raises, as several tuning trials may share the process.
+    # Automatic GC is optionally replaced by a collection every
+    # `manual_gc_interval_steps` steps.
+    with _frozen_gc(disable_automatic_gc=next_gc_step >= 0):
+      while True:
+        if log_steps:
+          logging.debug('step=`%d`: Beginning', step_i)
+        checkpointer.save_if_needed(
             step_i,
-            train_p.num_train_steps,
+            partitioned_train_state,
+            train_state_unpadded_shapes,
+            train_state_partition_specs,
+            train_input_for_checkpoint,
         )
-        break
-
-      program_output = train_program.run(partitioned_train_state, step_i)
-      partitioned_train_state = program_output.state
-      train_weighted_scalars = program_output.aux.weighted_scalars
-      steps_per_sec = program_output.aux.steps_per_sec
-      eval_train_metrics = program_output.aux.eval_train_metrics
-
-      # While the eval ones below are post-model weight updates, hence the step
-      # counter is incremented in between.
-      step_i = program_output.aux.new_train_step
-
-      eval_metrics: Optional[tuning_lib.EvalMetrics] = None
-      # Run eval at regular step interval.
-      if (
-          train_p.eval_interval_steps
-          and step_i % train_p.eval_interval_steps == 0
-      ):
-        logging.debug('  Starting eval_step().')
-        eval_partitioned_train_state = programs.get_eval_train_state(
-            task, partitioned_train_state
-        )
-        # If we have eval test then also evaluate on test.
-        if eval_programs:
-          logging.debug('  Performing eval_step() runs on test splits.')
-          with py_utils.timeit() as eval_period:
-            eval_metrics_list, eval_scoring_metrics_list, num_eval_steps = (
-                eval_lib.run_eval_loop_over_test_splits(
-                    eval_programs,
-                    eval_partitioned_train_state,
-                    eval_prng_seed,
-                    step_i,
-                    job_log_dir,
-                )
-            )
-          eval_steps_per_sec = sum(num_eval_steps) / eval_period.elapsed
-          eval_metrics = tuning_lib.EvalMetrics(
-              metrics_list=eval_metrics_list,
-              scoring_metrics_list=eval_scoring_metrics_list,
-              steps_per_sec=eval_steps_per_sec,
-              input_names=[prog.eval_input.name for prog in eval_programs],
+        if exit_after_ondemand_checkpoint and checkpointer.reached_preemption(
+            step_i
+        ):
+          checkpointer.wait_until_finished()
+          exit(1)
+
+        if not train_program.should_run(partitioned_train_state, step_i):
+          logging.info(
+              (
+                  'Training loop completed (step (`%d`) greater than '
+                  'num_train_step (`%d`).'
+              ),
+              step_i,
+              num_train_steps,
           )
-          logging.debug(
-              '  Completed eval_step() runs on test splits in %f seconds.',
-              eval_period.elapsed,
+          break
+
+        program_output = train_program.run(partitioned_train_state, step_i)
+        partitioned_train_state = program_output.state
+        aux = program_output.aux
+        train_weighted_scalars = aux.weighted_scalars
+        steps_per_sec = aux.steps_per_sec
+        eval_train_metrics = aux.eval_train_metrics
+
+        # While the eval ones below are post-model weight updates, hence the
+        # step counter is incremented in between.
+        step_i = aux.new_train_step
+        if refreeze_gc:
+          refreeze_gc = False
+          gc.collect()
+          gc.freeze()
+        if 0 <= next_gc_step <= step_i:
+          next_gc_step = _next_interval_step(step_i, manual_gc_interval_steps)
+          gc.collect()
+
+        eval_metrics: Optional[tuning_lib.EvalMetrics] = None
+        # Run eval at regular step interval.
+        if 0 <= next_eval_step <= step_i:
+          next_eval_step = _next_interval_step(step_i, eval_interval_steps)
+          logging.debug('  Starting eval_step().')
+          eval_partitioned_train_state = programs.get_eval_train_state(
+              task, partitioned_train_state
           )
+          # If we have eval test then also evaluate on test.
+          if eval_programs:
+            if eval_setup_futures:
+              for future in eval_setup_futures:
+                future.result()
+              eval_setup_futures = []
+              trainer_lib.check_unique_names(
+                  [prog.eval_input for prog in eval_programs]
+              )
+            logging.debug('  Performing eval_step() runs on test splits.')
+            with py_utils.timeit() as eval_period:
+              eval_metrics_list, eval_scoring_metrics_list, num_eval_steps = (
+                  eval_lib.run_eval_loop_over_test_splits(
+                      eval_programs,
+                      eval_partitioned_train_state,
+                      eval_prng_seed,
+                      step_i,
+                      job_log_dir,
+                  )
+              )
+            eval_steps_per_sec = sum(num_eval_steps) / eval_period.elapsed
+            eval_metrics = tuning_lib.EvalMetrics(
+                metrics_list=eval_metrics_list,
+                scoring_metrics_list=eval_scoring_metrics_list,
+                steps_per_sec=eval_steps_per_sec,
+                input_names=[prog.eval_input.name for prog in eval_programs],
+            )
+            logging.debug(
+                '  Completed eval_step() runs on test splits in %f seconds.',
+                eval_period.elapsed,
+            )
 
-      decode_metrics: Optional[tuning_lib.DecodeMetrics] = None
-      if (
-          decode_input_p
-          and train_p.decode_interval_steps
-          and step_i % train_p.decode_interval_steps == 0
-      ):
-        if train_p.decode_use_ema_states:
-          if not tasks_lib.has_ema(task_p):
-            raise ValueError(
-                'decode_use_ema_states is requested but the '
-                'learner does not seem to have ema enabled'
+        decode_metrics: Optional[tuning_lib.DecodeMetrics] = None
+        if 0 <= next_decode_step <= step_i:
+          next_decode_step = _next_interval_step(step_i, decode_interval_steps)
+          if decode_use_ema_states:
+            decode_partitioned_train_state = tasks_lib.extract_ema(
+                partitioned_train_state
             )
-          decode_partitioned_train_state = tasks_lib.extract_ema(
-              partitioned_train_state
+            logging.debug('  Performing decode_once_fn() with ema states.')
+          else:
+            decode_partitioned_train_state = partitioned_train_state
+          decode_metrics = decode_once_fn(
+              decode_partitioned_train_state, decode_summary_writers
           )
-          logging.debug('  Performing decode_once_fn() with ema states.')
-        else:
-          decode_partitioned_train_state = partitioned_train_state
-        decode_metrics = decode_once_fn(
-            decode_partitioned_train_state, decode_summary_writers
-        )
 
-      logging.debug('step=`%d`: End', step_i - 1)
+        if log_steps:
+          logging.debug('step=`%d`: End', step_i - 1)
 
-      if early_stopping_fn is not None:
-        if tuning_lib.should_early_stop(
-            early_stopping_fn,
-            step_i,
-            is_last_ckpt=tuning_lib.is_last_checkpoint(
-                RunningMode.detect(
-                    has_train_metrics=True,
-                    has_eval_metrics=bool(eval_metrics),
-                    has_decode_metrics=bool(decode_metrics),
-                ),
+        if early_stopping_fn is not None:
+          has_eval_metrics = bool(eval_metrics)
+          has_decode_metrics = bool(decode_metrics)
+          if has_eval_metrics or has_decode_metrics:
+            is_last_ckpt = tuning_lib.is_last_checkpoint(
+                running_modes[has_eval_metrics, has_decode_metrics],
                 step_i,
-                task_p.train.num_train_steps,
-                task_p.train.eval_interval_steps,
-                task_p.train.decode_interval_steps,
-                task_p.train.save_interval_steps,
-                train_to_end=getattr(
-                    early_stopping_fn, 'train_to_end', False)
-            ),
-            train_weighted_scalars=train_weighted_scalars,
-            eval_train_metrics=eval_train_metrics,
-            eval_metrics=eval_metrics,
-            decode_metrics=decode_metrics,
-            train_steps_per_sec=steps_per_sec,
-            num_params=total_num_params,
-        ):
-          logging.info(
-              (
-                  'Training loop is early stopped at step `%d` by the '
-                  'tuner, while num_train_step is `%d`.'
-              ),
+                num_train_steps,
+                eval_interval_steps,
+                decode_interval_steps,
+                save_interval_steps,
+                train_to_end=train_to_end,
+            )
+          else:
+            # What is_last_checkpoint() reduces to for RunningMode.TRAIN.
+            is_last_ckpt = step_i == num_train_steps
+          if tuning_lib.should_early_stop(
+              early_stopping_fn,
               step_i,
-              train_p.num_train_steps,
-          )
-          break
-    gc.unfreeze()
+              is_last_ckpt=is_last_ckpt,
+              train_weighted_scalars=train_weighted_scalars,
+              eval_train_metrics=eval_train_metrics,
+              eval_metrics=eval_metrics,
+              decode_metrics=decode_metrics,
+              train_steps_per_sec=steps_per_sec,
+              num_params=total_num_params,
+          ):
+            logging.info(
+                (
+                    'Training loop is early stopped at step `%d` by the '
+                    'tuner, while num_train_step is `%d`.'
+                ),
+                step_i,
+                num_train_steps,
+            )
+            break
     # Save checkpoint for the last step.
     checkpointer.save_final(
         step_i,
         partitioned_train_state=partitioned_train_state,
-        train_state_unpadded_shape_dtype_struct=train_state_metadata.unpadded_global_shapes,
-        train_state_pspecs=train_state_metadata.partition_specs,
+        train_state_unpadded_shape_dtype_struct=train_state_unpadded_shapes,
+        train_state_pspecs=train_state_partition_specs,
         train_input_pipeline=train_input_for_checkpoint,
     )
-
-    checkpointer.wait_until_finished()
+    # The eval programs are shut down by the caller, after their setup is done.
+    # Their setup may never have been needed, so its errors are only logged.
+    concurrent.futures.wait(eval_setup_futures)
+    for future in eval_setup_futures:
+      if future.exception() is not None:
+        logging.error('Eval program setup failed: %r', future.exception())
+    # The caller waits for the final save to be persisted, so that it
+    # overlaps with shutting down the programs.
@@ -0,0 +1,61 @@
+# coding=utf-8
+# Copyright 2022 The Pax Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for executors."""
+
+from absl.testing import absltest
+import jax
+import jax.numpy as jnp
+from paxml import executors
+
+
+def _shape_dtype(shape, dtype=jnp.float32):
+  return jax.ShapeDtypeStruct(shape, dtype)
+
+
+class ShapeDtypeSignatureTest(absltest.TestCase):
+
+  def test_same_shapes_and_dtypes(self):
+    inputs = {'ids': _shape_dtype((8, 16), jnp.int32), 'x': _shape_dtype((8,))}
+    same_inputs = {
+        'ids': _shape_dtype((8, 16), jnp.int32),
+        'x': _shape_dtype((8,)),
+    }
+    signature = executors._shape_dtype_signature(inputs)  # pylint: disable=protected-access
+    same_signature = executors._shape_dtype_signature(same_inputs)  # pylint: disable=protected-access
+    # Signatures key the partitioned decode steps.
+    self.assertEqual(signature, same_signature)
+    self.assertEqual(hash(signature), hash(same_signature))
+
+  def test_different_shapes_dtypes_or_structure(self):
+    inputs = {'ids': _shape_dtype((8, 16), jnp.int32), 'x': _shape_dtype((8,))}
+    signature = executors._shape_dtype_signature(inputs)  # pylint: disable=protected-access
+    for other_inputs in (
+        {'ids': _shape_dtype((8, 32), jnp.int32), 'x': _shape_dtype((8,))},
+        {
+            'ids': _shape_dtype((8, 16), jnp.int32),
+            'x': _shape_dtype((8,), jnp.bfloat16),
+        },
+        {'ids': _shape_dtype((8, 16), jnp.int32), 'y': _shape_dtype((8,))},
+        {'ids': _shape_dtype((8, 16), jnp.int32)},
+    ):
+      self.assertNotEqual(
+          signature,
+          executors._shape_dtype_signature(other_inputs),  # pylint: disable=protected-access
+      )
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -152,6 +152,10 @@ flags.DEFINE_bool('enable_auto_sharding', False,
 flags.DEFINE_bool(
     'enable_checkpoint_saving', True,
     'Enable checkpoint saving. Useful to disable for test- or debug-like runs.')
+flags.DEFINE_bool(
+    'enable_compilation_cache', False,
+    'If True, persists compiled step functions under <job_log_dir>/jax_cache '
+    'so that restarts of the job can skip recompiling them.')
 flags.DEFINE_bool(
     'enforce_restore_shape_check',
     False,
@@ -434,7 +438,10 @@ def main(argv: Sequence[str]) -> None:
                       should_initialize_jax_distributed,
                       setup_jax.JaxDistributedOptions(FLAGS.server_addr,
                                                       FLAGS.num_hosts,
-                                                      FLAGS.host_idx)
+                                                      FLAGS.host_idx),
+                      compilation_cache_dir=(
+                          str(FLAGS.job_log_dir / 'jax_cache')
+                          if FLAGS.enable_compilation_cache else None),
                      )
 
   if FLAGS.exp is not None:
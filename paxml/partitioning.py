@@ -568,16 +568,21 @@ class PmapPartitioner(Partitioner):
           var_weight_hparams=metadata.var_weight_hparams,
       )
 
-    logging.info(
-        'train state shapes: %s', jax.tree_map(lambda x: x.shape, train_state)
-    )
+    # The shapes are only walked when they are going to be logged.
+    log_shapes = logging.level_info()
+    if log_shapes:
+      logging.info(
+          'train state shapes: %s',
+          jax.tree_map(lambda x: x.shape, train_state),
+      )
     replicated_train_state = trainer_lib.replicate_model_state(train_state)
     # Unreplicated model states are not needed anymore at that point.
     del train_state
-    logging.info(
-        'replicated train state shapes: %s',
-        jax.tree_map(lambda x: x.shape, replicated_train_state),
-    )
+    if log_shapes:
+      logging.info(
+          'replicated train state shapes: %s',
+          jax.tree_map(lambda x: x.shape, replicated_train_state),
+      )
 
     # From now on, different replicas should use different random seeds.
     # Here, each process will have its unique prng key.
@@ -749,10 +754,12 @@ class PjitPartitioner(Partitioner):
               var_weight_hparams=metadata.var_weight_hparams,
           )
       )
-    logging.info(
-        'partitioned train state shapes (global shape): %s',
-        jax.tree_map(lambda x: x.shape, partitioned_train_state),
-    )
+    # The shapes are only walked when they are going to be logged.
+    if logging.level_info():
+      logging.info(
+          'partitioned train state shapes (global shape): %s',
+          jax.tree_map(lambda x: x.shape, partitioned_train_state),
+      )
 
     # We do not fold in jax.process_index in contrast to the pmap version and
     # use a single global key instead to rely on pjit to split for different
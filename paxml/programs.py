@@ -16,6 +16,7 @@
 """The basic program concept that encapsulates a per-step runnable."""
 import abc
 import collections
+import concurrent.futures
 import contextlib
 import dataclasses
 import queue
@@ -149,6 +150,57 @@ class _InflightQueue:
         self._inflight_queue.get().block_until_ready()
 
 
+class _InputPrefetcher:
+  """Runs one input fetch ahead in a background thread.
+
+  All other accesses to the underlying input pipeline must happen after
+  `wait()` or `peek()`, since input pipelines are not thread-safe.
+  """
+
+  def __init__(self, fetch_fn: Callable[[], NestedJTensor]):
+    self._fetch_fn = fetch_fn
+    self._pool = concurrent.futures.ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix='InputPrefetcher'
+    )
+    self._pending: Optional[concurrent.futures.Future] = None
+
+  def prefetch(self) -> None:
+    """Starts fetching the next inputs."""
+    assert self._pending is None
+    self._pending = self._pool.submit(self._fetch_fn)
+
+  def get(self) -> Optional[NestedJTensor]:
+    """Returns the prefetched inputs, or None if nothing was prefetched."""
+    if self._pending is None:
+      return None
+    pending, self._pending = self._pending, None
+    return pending.result()
+
+  def has_prefetched(self) -> bool:
+    """Returns whether a fetch was started and not yet consumed by `get()`."""
+    return self._pending is not None
+
+  def peek(self) -> Optional[NestedJTensor]:
+    """Returns the prefetched inputs without consuming them.
+
+    Returns:
+      The prefetched inputs, or None if nothing was prefetched or the fetch
+      failed, in which case the error is raised by the next `get()`.
+    """
+    if self._pending is None or self._pending.exception() is not None:
+      return None
+    return self._pending.result()
+
+  def wait(self) -> None:
+    """Waits for the in-flight fetch (if any) to complete."""
+    if self._pending is not None:
+      concurrent.futures.wait([self._pending])
+
+  def close(self) -> None:
+    self._pool.shutdown(wait=True)
+    self._pending = None
+
+
 class BaseTrainProgram(Program):
   """A lean interface of a basic train program.
 
@@ -177,6 +229,8 @@ class BaseTrainProgram(Program):
     self._train_summary_last_step = None
     # Used to limit the number of inflight training steps.
     self._pending_train_losses: _InflightQueue = None
+    # Used to fetch the inputs of the next train step ahead of time.
+    self._train_input_prefetcher: _InputPrefetcher = None
 
     # Other states used during training.
     self._first_step_completion_time: float = None
@@ -213,13 +267,23 @@ class BaseTrainProgram(Program):
     self._eval_prng_seed = eval_prng_seed
     self._initial_step = init_step
 
-    # Creates the train summary writer and handler.
+    # Creates the train summary writers, as well as the one for eval on train
+    # input if needed, together.
+    train_p = self._task.train
     summary_base_dir = _summary_base_dir(job_log_dir)
-    summary_train_dir = summary_base_dir / 'train'
-    self._train_summary_writer = self._exitstack.enter_context(
-        summary_utils.get_summary_writer(summary_train_dir)
+    summary_dirs = [summary_base_dir / 'train']
+    # Eval on train input only runs every `eval_interval_steps`.
+    run_eval_train = bool(
+        train_p.eval_interval_steps and not train_p.eval_skip_train
     )
-    train_p = self._task.train
+    if run_eval_train:
+      summary_dirs.append(summary_base_dir / 'eval_train')
+    summary_writers = summary_utils.enter_summary_writers(
+        self._exitstack, summary_dirs
+    )
+
+    # Creates the train summary handler.
+    self._train_summary_writer = summary_writers[0]
     self._train_summary_handler = summary_utils.SummaryHandler(
         self._train_summary_writer,
         train_p.summary_interval_steps,
@@ -230,15 +294,12 @@ class BaseTrainProgram(Program):
     )
 
     # Creates the summary writer and handler for eval on train input.
-    if not train_p.eval_skip_train:
-      summary_eval_train_dir = summary_base_dir / 'eval_train'
-      eval_train_summary_writer = self._exitstack.enter_context(
-          summary_utils.get_summary_writer(summary_eval_train_dir)
-      )
+    if run_eval_train:
       self._eval_train_summary_handler = summary_utils.SummaryHandler(
-          eval_train_summary_writer,
+          summary_writers[1],
           train_p.summary_interval_steps,
           accumulate_interval_steps=train_p.summary_accumulate_interval_steps,
+          is_async=bool(train_p.device_sync_interval_steps),
           name='eval',
       )
 
@@ -254,38 +315,55 @@ class BaseTrainProgram(Program):
     self._train_summary_last_time = time.time()
     self._train_summary_last_step = init_step - 1
     self._pending_train_losses = _InflightQueue(train_p.max_inflight_steps)
+    if (
+        train_p.prefetch_train_inputs
+        and not train_p.enable_input_checkpointing
+    ):
+      self._train_input_prefetcher = _InputPrefetcher(self._fetch_train_inputs)
 
   def should_run(self, state: TrainState, step: int) -> bool:
     return step < self._task.train.num_train_steps
 
   # TODO(laigd): further split this into smaller modules and add program APIs
   # correspondingly.
+  def _fetch_train_inputs(self) -> NestedJTensor:
+    """Retrieves the next training inputs, ready to be passed to train_step."""
+    return self._partitioner.preprocess_inputs(
+        self._train_input,
+        self._train_input.get_next_padded(),
+        self.train_input_partition_spec,
+    )
+
   def run(self, state: TrainState, step: int) -> ProgramOutput:
     train_p = self._task.train
     logging.debug('  Retrieving inputs.')
-    model_inputs = self._train_input.get_next_padded()
-    if train_p.enforce_input_specs and step == self._initial_step:
-      # At the first step, checks that the input specs provided by the input
-      # specs provider matches the shape/dtype of the actual input.
-      inputs_shape_dtype = jax.tree_map(
-          lambda x: jax.ShapeDtypeStruct(shape=x.shape, dtype=x.dtype),
-          model_inputs,
-      )
-
-      if not trees.is_subset(
-          self._partitioner.train_inputs_shape_dtype, inputs_shape_dtype
-      ):
-        raise ValueError(
-            'Spec of actual training input does not match train input specs. '
-            f'Spec of actual training input: {inputs_shape_dtype}, '
-            f'train input specs: {self._partitioner.train_inputs_shape_dtype}'
+    model_inputs = None
+    if self._train_input_prefetcher:
+      model_inputs = self._train_input_prefetcher.get()
+    if model_inputs is None:
+      model_inputs = self._train_input.get_next_padded()
+      if train_p.enforce_input_specs and step == self._initial_step:
+        # At the first step, checks that the input specs provided by the input
+        # specs provider matches the shape/dtype of the actual input.
+        inputs_shape_dtype = jax.tree_map(
+            lambda x: jax.ShapeDtypeStruct(shape=x.shape, dtype=x.dtype),
+            model_inputs,
         )
 
-    model_inputs = self._partitioner.preprocess_inputs(
-        self._train_input,
-        model_inputs,
-        self.train_input_partition_spec,
-    )
+        if not trees.is_subset(
+            self._partitioner.train_inputs_shape_dtype, inputs_shape_dtype
+        ):
+          raise ValueError(
+              'Spec of actual training input does not match train input specs.'
+              f' Spec of actual training input: {inputs_shape_dtype}, train'
+              f' input specs: {self._partitioner.train_inputs_shape_dtype}'
+          )
+
+      model_inputs = self._partitioner.preprocess_inputs(
+          self._train_input,
+          model_inputs,
+          self.train_input_partition_spec,
+      )
     logging.debug('  Retrieved inputs.')
 
     # Waits if it reaches max inflight steps. We do this after retrieving the
@@ -316,6 +394,10 @@ class BaseTrainProgram(Program):
     logging.debug(
         '  Completed train_step() in %f seconds.', train_period.elapsed
     )
+    # The train step is dispatched asynchronously, so fetching the next inputs
+    # now overlaps with its execution.
+    if self._train_input_prefetcher and step + 1 < train_p.num_train_steps:
+      self._train_input_prefetcher.prefetch()
     self._pending_train_losses.add_computation(loss)
     if step == self._initial_step:
       self._first_step_completion_time = time.time()
@@ -466,15 +548,24 @@ class BaseTrainProgram(Program):
       logging.debug('  train_p.eval_skip_train is True. Skipping eval_train.')
     else:
       logging.debug('  Retrieving eval model_inputs.')
-      eval_inputs = self._train_input.peek_padded()
+      if (
+          self._train_input_prefetcher
+          and self._train_input_prefetcher.has_prefetched()
+      ):
+        # The next train batch has already been read from the pipeline, so it
+        # is the one to evaluate on, rather than a peek at the one after.
+        eval_inputs = self._train_input_prefetcher.peek()
+      else:
+        eval_inputs = self._train_input.peek_padded()
+        if eval_inputs is not None:
+          eval_inputs = self._partitioner.preprocess_inputs(
+              self._train_input, eval_inputs, self.train_input_partition_spec
+          )
       if eval_inputs is None:
         logging.debug('  eval_inputs is None. Skipping eval_train.')
       else:
         logging.debug('  Retrieved eval model_inputs.')
         logging.debug('  Performing eval_step() runs on training split.')
-        eval_inputs = self._partitioner.preprocess_inputs(
-            self._train_input, eval_inputs, self.train_input_partition_spec
-        )
 
         eval_state = get_eval_train_state(self._task, new_state)
         loss, weighted_scalars, _, summary_tensors = self.eval_train_step(
@@ -497,6 +588,8 @@ class BaseTrainProgram(Program):
     return self._train_unpadded_global_batch_size
 
   def shutdown(self) -> None:
+    if self._train_input_prefetcher:
+      self._train_input_prefetcher.close()
     self._pending_train_losses.wait_for_all()
     self._train_summary_handler.close()
     if self._eval_train_summary_handler:
@@ -655,6 +748,7 @@ class BaseEvalProgram(Program):
     self._eval_unpadded_global_batch_size: int = None
     self._eval_num_steps: int = None
     self._eval_summary_writer = None
+    self._eval_input_prefetcher: _InputPrefetcher = None
 
     # Used to enter context of the summary writer at .setup().
     self._exitstack = contextlib.ExitStack()
@@ -700,6 +794,8 @@ class BaseEvalProgram(Program):
     self._eval_summary_writer = self._exitstack.enter_context(
         summary_utils.get_summary_writer(summary_dir)
     )
+    if task.train.prefetch_eval_inputs:
+      self._eval_input_prefetcher = _InputPrefetcher(self._fetch_eval_inputs)
 
   def should_run(self, state: TrainState, step: int) -> bool:
     # TODO(laigd): implement and use this.
@@ -782,6 +878,19 @@ class BaseEvalProgram(Program):
         ),
     )
 
+  def _fetch_eval_inputs(self) -> Tuple[NestedJTensor, NestedJTensor]:
+    """Retrieves the next eval inputs and their XLA-unsupported part."""
+    eval_inputs = self.eval_input.get_next_padded()
+    eval_inputs, unsupported_inputs, supported_input_partition_spec = (
+        xla_passthrough.split_out_xla_unsupported_batch(
+            eval_inputs, partitioning_spec=self.eval_input_partition_spec
+        )
+    )
+    eval_inputs = self._partitioner.preprocess_inputs(
+        self.eval_input, eval_inputs, supported_input_partition_spec
+    )
+    return eval_inputs, unsupported_inputs
+
   def _run_eval_loop(self, state: TrainState):
     losses = []
     summary_tensor_dict = {}
@@ -792,7 +901,11 @@ class BaseEvalProgram(Program):
     # self._eval_num_steps < 0 indicates running until input out of range.
     while self._eval_num_steps < 0 or step_num < self._eval_num_steps:
       try:
-        eval_inputs = self.eval_input.get_next_padded()
+        fetched = None
+        if self._eval_input_prefetcher:
+          fetched = self._eval_input_prefetcher.get()
+        if fetched is None:
+          fetched = self._fetch_eval_inputs()
       except (tf.errors.OutOfRangeError, StopIteration):
         if self._eval_num_steps > 0:
           raise
@@ -801,20 +914,20 @@ class BaseEvalProgram(Program):
         break
 
       step_num += 1
-      eval_inputs, unsupported_inputs, supported_input_partition_spec = (
-          xla_passthrough.split_out_xla_unsupported_batch(
-              eval_inputs, partitioning_spec=self.eval_input_partition_spec
-          )
-      )
-      eval_inputs = self._partitioner.preprocess_inputs(
-          self.eval_input, eval_inputs, supported_input_partition_spec
-      )
+      eval_inputs, unsupported_inputs = fetched
       loss, weighted_scalars, per_example_out, summary_tensors = self.eval_step(
           state,
           self._eval_prng_seed,
           eval_inputs,
           self._eval_unpadded_global_batch_size,
       )
+      # The eval step is dispatched asynchronously, so fetching the next inputs
+      # now overlaps with its execution. No more than the requested number of
+      # batches is fetched, as the pipeline may not be reset between evals.
+      if self._eval_input_prefetcher and (
+          self._eval_num_steps < 0 or step_num < self._eval_num_steps
+      ):
+        self._eval_input_prefetcher.prefetch()
       xla_passthrough.merge_back_xla_unsupported_batch(
           per_example_out, unsupported_inputs
       )
@@ -852,6 +965,8 @@ class BaseEvalProgram(Program):
     """The partition spec for the eval inputs."""
 
   def shutdown(self) -> None:
+    if self._eval_input_prefetcher:
+      self._eval_input_prefetcher.close()
     self._exitstack.close()
 
 
@@ -142,6 +142,33 @@ class SingleTaskPjitTrainProgramTest(ProgramTestBase):
     self.assertEqual(2, train_pg.train_unpadded_global_batch_size)
 
 
+class InputPrefetcherTest(absltest.TestCase):
+
+  def test_prefetch_preserves_order(self):
+    batches = iter(range(3))
+    prefetcher = programs._InputPrefetcher(lambda: next(batches))
+    self.assertIsNone(prefetcher.get())
+    prefetcher.prefetch()
+    prefetcher.wait()
+    self.assertEqual(0, prefetcher.get())
+    self.assertIsNone(prefetcher.get())
+    prefetcher.prefetch()
+    self.assertEqual(1, prefetcher.get())
+    prefetcher.close()
+
+  def test_peek_does_not_consume(self):
+    batches = iter(range(3))
+    prefetcher = programs._InputPrefetcher(lambda: next(batches))
+    self.assertFalse(prefetcher.has_prefetched())
+    self.assertIsNone(prefetcher.peek())
+    prefetcher.prefetch()
+    self.assertTrue(prefetcher.has_prefetched())
+    self.assertEqual(0, prefetcher.peek())
+    self.assertEqual(0, prefetcher.get())
+    self.assertFalse(prefetcher.has_prefetched())
+    prefetcher.close()
+
+
 if __name__ == '__main__':
   os.environ['XLA_FLAGS'] = '--xla_force_host_platform_device_count=2'
   absltest.main()
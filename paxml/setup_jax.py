@@ -34,7 +34,8 @@ def setup_jax(globally_use_hardware_rng: bool,
               jax_enable_checks: bool,
               jax_traceback_filtering_option: str = 'auto',
               should_initialize_jax_distributed: bool = False,
-              jax_distributed_options: Optional[JaxDistributedOptions] = None,) -> None:
+              jax_distributed_options: Optional[JaxDistributedOptions] = None,
+              compilation_cache_dir: Optional[str] = None,) -> None:
   """Setups JAX and logs information about this job."""
 
   # Hide any GPUs from TensorFlow. Otherwise TF might reserve memory and make
@@ -63,6 +64,15 @@ def setup_jax(globally_use_hardware_rng: bool,
     jax_xla_backend = 'None' if jax_xla_backend is None else jax_xla_backend
     logging.info('Using JAX XLA backend %s', jax_xla_backend)
 
+  if compilation_cache_dir:
+    # Persists compiled executables so that restarts skip recompiling the
+    # step functions.
+    # pylint: disable=g-import-not-at-top
+    from jax.experimental.compilation_cache import compilation_cache
+    # pylint: enable=g-import-not-at-top
+    compilation_cache.initialize_cache(compilation_cache_dir)
+    logging.info('Using JAX compilation cache at %s', compilation_cache_dir)
+
   if should_initialize_jax_distributed:
     if jax_distributed_options:
       jax.distributed.initialize(jax_distributed_options.coordinator_address,
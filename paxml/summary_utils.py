@@ -296,6 +296,39 @@ def get_summary_writer(summary_dir: epath.Path) -> Iterator[SummaryWriter]:
       logging.info('Closed a mock-like SummaryWriter.')
 
 
+def enter_summary_writers(
+    exit_stack: contextlib.ExitStack, summary_dirs: Sequence[epath.Path]
+) -> List[SummaryWriter]:
+  """Opens a SummaryWriter per directory and registers it in `exit_stack`.
+
+  Opening a writer creates its directory and event file, which is a roundtrip
+  to the (possibly remote) file system, so the writers are opened concurrently.
+  Non-zero processes only open no-op writers, which touch no file system, and
+  open them inline. On error, the writers that did open are still registered
+  in `exit_stack`.
+
+  Args:
+    exit_stack: The exit stack that closes the writers.
+    summary_dirs: The summary directories.
+
+  Returns:
+    The summary writers, in the order of `summary_dirs`.
+  """
+  writer_contexts = [get_summary_writer(d) for d in summary_dirs]
+  if len(writer_contexts) <= 1 or jax.process_index() != 0:
+    return [exit_stack.enter_context(c) for c in writer_contexts]
+
+  with concurrent.futures.ThreadPoolExecutor(
+      max_workers=min(8, len(writer_contexts)),
+      thread_name_prefix='SummaryWriters',
+  ) as pool:
+    futures = [pool.submit(c.__enter__) for c in writer_contexts]
+  for writer_context, future in zip(writer_contexts, futures):
+    if future.exception() is None:
+      exit_stack.push(writer_context)
+  return [f.result() for f in futures]
+
+
 def flatten_summary_dict(summary_dict: Dict[str, JTensor],
                          parent_key: Optional[str] = None) -> List[Any]:
   """Flattens a summary dictionary."""
@@ -447,21 +480,24 @@ def write_model_structure(
     train_summary_writer: SummaryWriter,
     train_state: TrainState,
     is_vars_replicated,
+    flush: bool = True,
 ):
-  """Writes the Model Param structure to TB."""
+  """Writes the Model Param structure to TB, then flushes if `flush`."""
   with train_summary_writer.as_default():
     out = pretty_repr_shapes(train_state.mdl_vars, is_vars_replicated)
     tf_summary.text(
         'Model', out, step=0
     )
-  train_summary_writer.flush()
+  if flush:
+    train_summary_writer.flush()
 
 
 def write_model_provenance(
     train_summary_writer: SummaryWriter,
     train_state_provenance: TrainStateProvenance,
+    flush: bool = True,
 ):
-  """Writes the TrainStateProvenance to TB."""
+  """Writes the TrainStateProvenance to TB, then flushes if `flush`."""
   with train_summary_writer.as_default():
     mdl_vars_out = pretty_repr_provenance(train_state_provenance.mdl_vars)
     tf_summary.text(
@@ -475,27 +511,33 @@ def write_model_provenance(
         opt_states_out,
         step=0,
     )
-  train_summary_writer.flush()
+  if flush:
+    train_summary_writer.flush()
 
 
 def write_total_num_params(
-    train_summary_writer: SummaryWriter, total_num_params: int
+    train_summary_writer: SummaryWriter,
+    total_num_params: int,
+    flush: bool = True,
 ):
-  """Writes the total number of parameters to TB."""
+  """Writes the total number of parameters to TB, then flushes if `flush`."""
   with train_summary_writer.as_default():
     # Add whitespace every 3 digit for readability.
     num_params_str = '{:,}'.format(total_num_params).replace(',', ' ')
     tf_summary.text('Total Num Params', num_params_str, step=0)
-  train_summary_writer.flush()
+  if flush:
+    train_summary_writer.flush()
 
 
 def write_global_batch_size(train_summary_writer: SummaryWriter,
-                            global_batch_size: int):
-  """Writes the global batch size to TB."""
+                            global_batch_size: int,
+                            flush: bool = True):
+  """Writes the global batch size to TB, then flushes if `flush`."""
   with train_summary_writer.as_default():
     batch_size_str = '{:,}'.format(global_batch_size).replace(',', ' ')
     tf_summary.text('Global batch size', batch_size_str, step=0)
-  train_summary_writer.flush()
+  if flush:
+    train_summary_writer.flush()
 
 
 class SummaryHandler:
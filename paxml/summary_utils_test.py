@@ -15,12 +15,14 @@
 
 """Tests for summary_utils."""
 
+import contextlib
 import math
 import os
 from unittest import mock
 
 from absl.testing import absltest
 from absl.testing import parameterized
+from etils import epath
 import jax.numpy as jnp
 import numpy as np
 from paxml import summary_utils
@@ -278,6 +280,17 @@ class SummaryUtilsTest(parameterized.TestCase):
         MatcherArrayAlmostEqual(np.array(summary_tensors_2['summary_c_audio'])),
         44000, 2)
 
+  def test_enter_summary_writers(self):
+    base_dir = epath.Path(self.create_tempdir().full_path)
+    summary_dirs = [base_dir / name for name in ('train', 'eval', 'decode')]
+    with contextlib.ExitStack() as exit_stack:
+      summary_writers = summary_utils.enter_summary_writers(
+          exit_stack, summary_dirs
+      )
+      self.assertLen(summary_writers, len(summary_dirs))
+    for summary_dir in summary_dirs:
+      self.assertTrue(summary_dir.exists())
+
 
 if __name__ == '__main__':
   absltest.main()
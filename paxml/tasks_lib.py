@@ -1196,6 +1196,54 @@ class SingleTask(base_task.BaseTask):
         checkpoints present in the main directory.
       external_checkpoint_handler: An orbax.checkpoint.CheckpointHandler
         defining logic for loading the checkpoint.
+      eager_input_prefetch: Whether to start fetching the first training batch
+        in a background thread while the train state is being restored, so that
+        the first train step does not pay for filling the input pipeline. Only
+        effective when the partitioner and the checkpointer do not use the
+        training input pipeline during setup. The input pipeline must then be
+        safe to read from a thread other than the one that created it.
+      async_checkpoint_save: Whether to save checkpoints with an Orbax
+        AsyncCheckpointer, as `--jax_fully_async_checkpoint` does for all
+        tasks. The train state is copied to host during the save call, then
+        written in the background while the next train steps run. Not
+        effective for Flax or persistence checkpoints. Multi-host jobs need
+        jax.distributed to be initialized.
+      async_checkpoint_skip_if_busy: With `async_checkpoint_save`, whether to
+        skip a scheduled checkpoint save, rather than wait for it, when the
+        previous save is still in progress. This avoids stalling training on
+        slow storage at the cost of fewer checkpoints. Saves on preemption and
+        the final save are never skipped.
+      manual_gc_interval_steps: If set, disables automatic garbage collection
+        in the training loop and instead runs a collection every this many
+        steps. Objects created before the loop are frozen, so each collection
+        only scans objects allocated by the loop itself, as are the ones
+        created by the first train step, such as JAX's compilation caches. This
+        avoids unpredictable collection pauses in between train steps.
+      prefetch_train_inputs: Whether to fetch and transfer the inputs of the
+        next train step in a background thread while the current train step
+        runs. Ignored when `enable_input_checkpointing` is set, since the
+        checkpointed input state would then include the prefetched batch.
+        Eval on the training split then runs on the prefetched batch, i.e. the
+        same batch it peeks at without prefetching.
+      background_eval_program_setup: Whether to set up the eval programs, i.e.
+        instantiate their input pipelines and open their summary writers, in
+        background threads while training starts, instead of before the first
+        train step. The setup is waited for at the first eval, where any setup
+        error then surfaces.
+      prefetch_eval_inputs: Whether to fetch and transfer the inputs of the
+        next eval step in a background thread while the current eval step runs.
+      concurrent_eval_program_setup: Whether to set up multiple eval programs
+        concurrently, in a thread pool, before the first train step. Input
+        pipelines must then be safe to instantiate from different threads.
+        Implied by `background_eval_program_setup`.
+      concurrent_decode_input_setup: Whether to instantiate multiple decode
+        input pipelines concurrently, in a thread pool. Input pipelines must
+        then be safe to instantiate from different threads.
+      pmap_shard_tensorstore_saves: For pmap models saved with tensorstore,
+        whether to shard each replicated array over the devices along its
+        first axis divisible by the number of devices, so that each device
+        writes a slice of it, instead of saving it from a single device. This
+        changes how the arrays are chunked on disk; restoring is unaffected.
     """
 
     learner: pax_fiddle.Config[learners_lib.Learner] = (
@@ -1239,6 +1287,16 @@ class SingleTask(base_task.BaseTask):
     external_checkpoint_handler: Optional[
         orbax.checkpoint.CheckpointHandler
     ] = None
+    eager_input_prefetch: bool = False
+    async_checkpoint_save: bool = False
+    async_checkpoint_skip_if_busy: bool = False
+    manual_gc_interval_steps: Optional[int] = None
+    prefetch_train_inputs: bool = False
+    background_eval_program_setup: bool = False
+    prefetch_eval_inputs: bool = False
+    concurrent_eval_program_setup: bool = False
+    concurrent_decode_input_setup: bool = False
+    pmap_shard_tensorstore_saves: bool = False
 
   TrainHParams = base_hyperparams.FiddleHParamsClassStub(Train)  # pylint: disable=invalid-name
 
@@ -17,14 +17,16 @@
 
 import contextlib
 import datetime
-import re
+import gc
+import operator
 import typing
-from typing import Any, Dict, Optional, Tuple, Type
+from typing import Any, Dict, Iterator, Optional, Tuple, Type
 
 from absl import logging
 from etils import epath
 import jax
 from jax import monitoring
+from jax.experimental import multihost_utils
 import jax.numpy as jnp
 import numpy as np
 import orbax.checkpoint
@@ -64,6 +66,9 @@ TrainStateProvenance = train_states.TrainStateProvenance
 _READ_CHECKPOINT_EVENT: str = '/jax/checkpoint/read/durations_sec'
 _WRITE_CHECKPOINT_EVENT: str = '/jax/checkpoint/write/durations_sec'
 
+# Number of seconds per duration unit, see `_parse_duration()`.
+_DURATION_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
 
 def _checkpoint_dir(job_log_dir: epath.Path) -> epath.Path:
   """Returns the checkpoint directory from the root `job_log_dir`."""
@@ -72,13 +77,31 @@ def _checkpoint_dir(job_log_dir: epath.Path) -> epath.Path:
 
 def _make_checkpoint_dir(job_log_dir: epath.Path) -> epath.Path:
   checkpoint_dir = _checkpoint_dir(job_log_dir)
-  if jax.process_index() == 0 and not checkpoint_dir.exists():
+  if jax.process_index() == 0:
+    # A no-op when the directory exists, without a separate exists() call.
     checkpoint_dir.mkdir(parents=True, exist_ok=True)
-  # Block all hosts until directory is ready.
-  py_utils.sync_global_devices(f'checkpointer:makedirs:{checkpoint_dir}')
+  # Block all hosts until directory is ready. This is not redundant with the
+  # barriers of the Orbax saves: the checkpoint manager created next lists this
+  # directory on every host (e.g. `latest_step()`) before anything is saved.
+  # It runs once per job, and saving issues no other barrier in this module.
+  if jax.process_count() > 1:
+    py_utils.sync_global_devices(f'checkpointer:makedirs:{checkpoint_dir}')
   return checkpoint_dir
 
 
+@contextlib.contextmanager
+def _gc_paused() -> Iterator[None]:
+  """Pauses automatic garbage collection, then runs a full collection."""
+  was_enabled = gc.isenabled()
+  gc.disable()
+  try:
+    yield
+  finally:
+    if was_enabled:
+      gc.enable()
+    gc.collect()
+
+
 def _parse_duration(
     duration_str: Optional[str],
 ) -> Optional[datetime.timedelta]:
@@ -90,34 +113,75 @@ def _parse_duration(
       's', e.g. '30s', the unit being the second, (c) an integer followed by
       'm', e.g. '15m', the unit being the minute, (d) an integer followed by
       'h', e.g. '2h', the unit being the hour or (e) an integer followed by 'd',
-      e.g. '1d' the unit being the hour.
+      e.g. '1d' the unit being the hour. Surrounding whitespace is ignored.
 
   Returns:
     The corresponding duration as a datetime.timedelta instance or None if the
     input was None.
+
+  Raises:
+    ValueError: If the string is not in one of the above formats.
   """
   if not duration_str:
     return None
-  pattern = re.compile(r'(\d+)(\w)*')
-  match = pattern.match(duration_str)
-  if (
-      not match
-      or len(match.groups()) != 2
-      or match.group(2) not in {None, 's', 'm', 'h', 'd'}
-  ):
-    raise ValueError(f'Unable to parse string duration `{duration_str}`.')
-  int_value = int(match.group(1))
-  if match.group(2) is None or match.group(2) == 's':
-    pass
-  elif match.group(2) == 'm':
-    int_value *= 60
-  elif match.group(2) == 'h':
-    int_value *= 3600
-  elif match.group(2) == 'd':
-    int_value *= 86400
+  stripped = duration_str.strip()
+  unit = stripped[-1:]
+  if unit.isdecimal():
+    value_str, unit_seconds = stripped, 1
   else:
+    value_str = stripped[:-1]
+    unit_seconds = _DURATION_UNIT_SECONDS.get(unit)
+  if unit_seconds is None or not value_str.isdecimal():
     raise ValueError(f'Unable to parse string duration `{duration_str}`.')
-  return datetime.timedelta(seconds=int_value)
+  return datetime.timedelta(seconds=int(value_str) * unit_seconds)
+
+
+def _convert_host_local_array_to_sharded_global_array(arr):
+  """Converts a replicated pmap array into a global array split over devices.
+
+  Like `py_utils.convert_host_local_array_to_global_array()`, except that the
+  first axis evenly divisible by the number of devices is sharded over all of
+  them. Each device then writes its own slice of the array when it is saved,
+  instead of a single device writing all of it. Arrays without such an axis are
+  converted to fully replicated global arrays.
+
+  Args:
+    arr: A host local array from pmap, replicated over the local devices.
+
+  Returns:
+    The corresponding global jax.Array.
+  """
+  global_shape = arr.addressable_data(0).shape
+  devices = jax.devices()
+  axis = next(
+      (i for i, d in enumerate(global_shape) if d and d % len(devices) == 0),
+      None,
+  )
+  if axis is None:
+    return py_utils.convert_host_local_array_to_global_array(arr)
+  partition_spec = [None] * len(global_shape)
+  partition_spec[axis] = 'x'
+  sharding = jax.sharding.NamedSharding(
+      jax.sharding.Mesh(np.array(devices), axis_names=('x',)),
+      jax.sharding.PartitionSpec(*partition_spec),
+  )
+  indices = sharding.addressable_devices_indices_map(global_shape)
+  dbs = [shard.data[indices[shard.device]] for shard in arr.addressable_shards]
+  return jax.make_array_from_single_device_arrays(global_shape, sharding, dbs)
+
+
+def _total_num_params(metadata: trainer_lib.TrainStateMetadata) -> int:
+  """Returns the number of model parameters, from the train state shapes.
+
+  For pmap models, this is the number of parameters of a single replica.
+
+  Args:
+    metadata: The train state metadata.
+  """
+  return sum(
+      int(np.prod(x.shape))
+      for x in jax.tree_util.tree_leaves(metadata.padded_global_shapes.mdl_vars)
+  )
 
 
 def _restore_from_external_checkpoint(
@@ -144,13 +208,49 @@ def _restore_from_external_checkpoint(
   )
 
 
-class _OrbaxPjitTrainingCheckpointer(checkpoints.TrainingCheckpointer):
+class _OrbaxTrainingCheckpointer(checkpoints.TrainingCheckpointer):
+  """Save logic shared by the Orbax pjit and pmap training checkpointers."""
+
+  checkpoint_manager: checkpoint_managers.OrbaxCheckpointManager
+  _enable_checkpoint_saving: bool
+  _skip_save_if_busy: bool
+
+  def wait_until_finished(self):
+    self.checkpoint_manager.wait_until_finished()
+
+  def reached_preemption(self, step: int) -> bool:
+    return self.checkpoint_manager.reached_preemption(step)
+
+  def _should_save(self, step_i: int) -> bool:
+    return self._enable_checkpoint_saving and (
+        self.checkpoint_manager.should_save(step_i)
+    )
+
+  def _should_skip_save(self, step_i: int) -> bool:
+    """Returns whether to skip a due save as the previous one is unfinished."""
+    if not self._skip_save_if_busy or self.reached_preemption(step_i):
+      return False
+    busy = self.checkpoint_manager.save_in_progress()
+    if jax.process_count() > 1:
+      # Saves are collective, so all hosts follow the decision of the first.
+      busy = bool(multihost_utils.broadcast_one_to_all(np.array(busy)))
+    if busy:
+      logging.warning(
+          'Skipping checkpoint save at step %d, the previous one is still in '
+          'progress.',
+          step_i,
+      )
+    return busy
+
+
+class _OrbaxPjitTrainingCheckpointer(_OrbaxTrainingCheckpointer):
 
   def __init__(
       self,
       checkpoint_manager: checkpoint_managers.OrbaxCheckpointManager,
       checkpoint_type: CheckpointType,
       enable_checkpoint_saving: bool = True,
+      skip_save_if_busy: bool = False,
       ocdbt_coordinator_server: Optional[Any] = None,
       restore_transformations: Optional[Dict[str, Any]] = None,
       external_checkpoint_path: Optional[epath.Path] = None,
@@ -163,6 +263,7 @@ class _OrbaxPjitTrainingCheckpointer(checkpoints.TrainingCheckpointer):
     if checkpoint_type == CheckpointType.FLAX:
       raise ValueError('FLAX checkpointing not supported for pjit models.')
     self._enable_checkpoint_saving = enable_checkpoint_saving
+    self._skip_save_if_busy = skip_save_if_busy
     self._ocdbt_coordinator_server = ocdbt_coordinator_server
     self._restore_transformations = restore_transformations
 
@@ -170,17 +271,18 @@ class _OrbaxPjitTrainingCheckpointer(checkpoints.TrainingCheckpointer):
     # TODO(b/278628399) Consider providing default implementation.
     self._external_checkpoint_handler = external_checkpoint_handler
     self._step_to_restore = self.checkpoint_manager.latest_step()
+    # The restore kwargs only depend on the checkpoint type, which is fixed.
+    if checkpoint_type == CheckpointType.GDA:
+      self._build_restore_args = self._gda_restore_args
+    elif checkpoint_type == CheckpointType.PERSISTENCE:
+      self._build_restore_args = self._persistence_restore_args
+    else:
+      self._build_restore_args = lambda global_mesh, train_state_pspecs: {}
 
   @property
   def step_to_restore(self) -> Optional[int]:
     return self._step_to_restore
 
-  def wait_until_finished(self):
-    self.checkpoint_manager.wait_until_finished()
-
-  def reached_preemption(self, step: int) -> bool:
-    return self.checkpoint_manager.reached_preemption(step)
-
   def _save_with_args(
       self,
       step_i: int,
@@ -213,26 +315,29 @@ class _OrbaxPjitTrainingCheckpointer(checkpoints.TrainingCheckpointer):
       train_state_pspecs,
       train_input_pipeline,
   ):
-    restore_args = {}
-    if self._checkpoint_type == CheckpointType.GDA:
-      restore_args = {
-          'specs': train_state_pspecs,
-          'mesh': global_mesh,
-          'transforms': self._restore_transformations,
-      }
-    elif self._checkpoint_type == CheckpointType.PERSISTENCE:
-      restore_args = {
-          'state_specs': train_state_pspecs,
-          'global_mesh': global_mesh,
-      }
     return self.checkpoint_manager.restore(
         step_i,
         train_state_global_shapes,
         train_state_unpadded_shape_dtype_struct,
         train_input_pipeline,
-        restore_kwargs=restore_args,
+        restore_kwargs=self._build_restore_args(
+            global_mesh, train_state_pspecs
+        ),
     )
 
+  def _gda_restore_args(self, global_mesh, train_state_pspecs):
+    return {
+        'specs': train_state_pspecs,
+        'mesh': global_mesh,
+        'transforms': self._restore_transformations,
+    }
+
+  def _persistence_restore_args(self, global_mesh, train_state_pspecs):
+    return {
+        'state_specs': train_state_pspecs,
+        'global_mesh': global_mesh,
+    }
+
   def save_final(
       self,
       step_i,
@@ -243,6 +348,8 @@ class _OrbaxPjitTrainingCheckpointer(checkpoints.TrainingCheckpointer):
       train_input_pipeline: Optional[base_input.BaseInput] = None,
   ):
     del train_state_pspecs
+    # Served from the steps tracked in memory by the checkpoint manager, this
+    # does not list the checkpoint directory.
     latest_step = self.checkpoint_manager.latest_step()
     if latest_step is None or latest_step < step_i:
       logging.info('Saving a ckpt at final step: %d', step_i)
@@ -263,7 +370,7 @@ class _OrbaxPjitTrainingCheckpointer(checkpoints.TrainingCheckpointer):
       train_input_pipeline=None,
   ):
     del train_state_pspecs
-    if not self.checkpoint_manager.should_save(step_i):
+    if not self._should_save(step_i) or self._should_skip_save(step_i):
       return
     self._save_with_args(
         step_i,
@@ -313,7 +420,7 @@ class _OrbaxPjitTrainingCheckpointer(checkpoints.TrainingCheckpointer):
         )
     )
 
-    total_num_params = py_utils.total_num_vars(partitioned_train_state.mdl_vars)
+    total_num_params = _total_num_params(metadata)
     return (
         partitioned_train_state,
         train_state_provenance,
@@ -326,7 +433,7 @@ class _OrbaxPjitTrainingCheckpointer(checkpoints.TrainingCheckpointer):
     return self._checkpoint_type
 
 
-class _OrbaxPmapTrainingCheckpointer(checkpoints.TrainingCheckpointer):
+class _OrbaxPmapTrainingCheckpointer(_OrbaxTrainingCheckpointer):
 
   def __init__(
       self,
@@ -334,6 +441,8 @@ class _OrbaxPmapTrainingCheckpointer(checkpoints.TrainingCheckpointer):
       checkpoint_manager: checkpoint_managers.OrbaxCheckpointManager,
       checkpoint_type: CheckpointType,
       enable_checkpoint_saving: bool = True,
+      skip_save_if_busy: bool = False,
+      shard_tensorstore_saves: bool = False,
       ocdbt_coordinator_server: Optional[Any] = None,
       restore_transformations: Optional[Dict[str, Any]] = None,
       external_checkpoint_path: Optional[epath.Path] = None,
@@ -346,6 +455,8 @@ class _OrbaxPmapTrainingCheckpointer(checkpoints.TrainingCheckpointer):
     self.checkpoint_manager = checkpoint_manager
     self._checkpoint_type = checkpoint_type
     self._enable_checkpoint_saving = enable_checkpoint_saving
+    self._skip_save_if_busy = skip_save_if_busy
+    self._shard_tensorstore_saves = shard_tensorstore_saves
     self._ocdbt_coordinator_server = ocdbt_coordinator_server
     self._restore_transformations = restore_transformations
     self._external_checkpoint_path = external_checkpoint_path
@@ -356,12 +467,6 @@ class _OrbaxPmapTrainingCheckpointer(checkpoints.TrainingCheckpointer):
   def step_to_restore(self) -> Optional[int]:
     return self._step_to_restore
 
-  def wait_until_finished(self):
-    self.checkpoint_manager.wait_until_finished()
-
-  def reached_preemption(self, step: int) -> bool:
-    return self.checkpoint_manager.reached_preemption(step)
-
   def _restore_with_args(
       self,
       step_i: int,
@@ -446,9 +551,7 @@ class _OrbaxPmapTrainingCheckpointer(checkpoints.TrainingCheckpointer):
         )
     )
 
-    total_num_params = py_utils.total_num_vars(replicated_train_state.mdl_vars)
-    assert total_num_params % jax.local_device_count() == 0
-    total_num_params = total_num_params // jax.local_device_count()
+    total_num_params = _total_num_params(metadata)
     return (
         replicated_train_state,
         train_state_provenance,
@@ -489,32 +592,27 @@ class _OrbaxPmapTrainingCheckpointer(checkpoints.TrainingCheckpointer):
         logging.info(
             'Saving a ckpt at %sstep: %d', 'final ' if is_final else '', step_i
         )
-        fully_replicated_gda_train_state = jax.tree_map(
-            py_utils.convert_host_local_array_to_global_array,
+        train_state = jax.tree_map(
+            _convert_host_local_array_to_sharded_global_array
+            if self._shard_tensorstore_saves
+            else py_utils.convert_host_local_array_to_global_array,
             partitioned_train_state,
         )
-        self._save_with_args(
-            step_i,
-            train_state=fully_replicated_gda_train_state,
-            train_state_unpadded_shape_dtype_struct=(
-                train_state_unpadded_shape_dtype_struct
-            ),
-            train_input_pipeline=train_input_pipeline,
-            force=is_final,
-        )
       else:
-        unreplicated_train_state = jax.tree_map(
-            lambda x: x[0], partitioned_train_state
-        )
-        self._save_with_args(
-            step_i,
-            train_state=unreplicated_train_state,
-            train_state_unpadded_shape_dtype_struct=(
-                train_state_unpadded_shape_dtype_struct
-            ),
-            train_input_pipeline=train_input_pipeline,
-            force=is_final,
+        # Indexing a pmap array returns the buffer of its first shard without a
+        # copy or a device to host transfer.
+        train_state = jax.tree_util.tree_map(
+            operator.itemgetter(0), partitioned_train_state
         )
+      self._save_with_args(
+          step_i,
+          train_state=train_state,
+          train_state_unpadded_shape_dtype_struct=(
+              train_state_unpadded_shape_dtype_struct
+          ),
+          train_input_pipeline=train_input_pipeline,
+          force=is_final,
+      )
     monitoring.record_event_duration_secs(
         _WRITE_CHECKPOINT_EVENT, save_period.elapsed
     )
@@ -527,7 +625,7 @@ class _OrbaxPmapTrainingCheckpointer(checkpoints.TrainingCheckpointer):
       train_state_pspecs,
       train_input_pipeline=None,
   ):
-    if not self.checkpoint_manager.should_save(step_i):
+    if not self._should_save(step_i) or self._should_skip_save(step_i):
       return
     self._save(
         step_i,
@@ -546,6 +644,8 @@ class _OrbaxPmapTrainingCheckpointer(checkpoints.TrainingCheckpointer):
       train_state_pspecs,
       train_input_pipeline: Optional[base_input.BaseInput] = None,
   ):
+    # Served from the steps tracked in memory by the checkpoint manager, this
+    # does not list the checkpoint directory.
     latest_step = self.checkpoint_manager.latest_step()
     if latest_step is None or latest_step < step_i:
       self._save(
@@ -593,7 +693,18 @@ def _create_checkpointer(
       cleanup_tmp_directories=True,
   )
 
+  # The Orbax AsyncCheckpointer copies the train state to host on the calling
+  # thread, so the train step may donate it right after, and only writes it in
+  # the background.
+  use_async_checkpointer = enable_async_checkpointing or (
+      train_p.async_checkpoint_save and not maybe_use_persistence_checkpointing
+  )
   if checkpoint_type == CheckpointType.FLAX:
+    if train_p.async_checkpoint_save:
+      logging.warning(
+          'async_checkpoint_save is not supported for Flax checkpoints, saving'
+          ' them synchronously.'
+      )
     if tensorstore_use_ocdbt:
       checkpointer = Checkpointer(
           PaxCheckpointHandler(
@@ -603,7 +714,7 @@ def _create_checkpointer(
       )
     else:
       checkpointer = FlaxCheckpointer(FlaxCheckpointHandler())
-  elif enable_async_checkpointing:
+  elif use_async_checkpointer:
     if maybe_use_persistence_checkpointing:
       raise NotImplementedError('Persistence checkpointer not supported.')
     else:
@@ -656,6 +767,7 @@ def _create_checkpointer(
         checkpoint_manager,
         checkpoint_type,
         enable_checkpoint_saving=enable_checkpoint_saving,
+        skip_save_if_busy=train_p.async_checkpoint_skip_if_busy,
         ocdbt_coordinator_server=ocdbt_coordinator_server,
         restore_transformations=restore_transformations,
         external_checkpoint_path=task_p.train.external_checkpoint_path,
@@ -667,6 +779,8 @@ def _create_checkpointer(
         checkpoint_manager,
         checkpoint_type,
         enable_checkpoint_saving=enable_checkpoint_saving,
+        skip_save_if_busy=train_p.async_checkpoint_skip_if_busy,
+        shard_tensorstore_saves=train_p.pmap_shard_tensorstore_saves,
         ocdbt_coordinator_server=ocdbt_coordinator_server,
         restore_transformations=restore_transformations,
         external_checkpoint_path=task_p.train.external_checkpoint_path,
@@ -685,18 +799,17 @@ def write_hparams_file(
   if jax.process_index() == 0:
     job_log_dir.mkdir(parents=True, exist_ok=True)
     params_fpath = job_log_dir / f'{filename_prefix}model_params.txt'
-    with params_fpath.open('w') as hparams_file:
-      for dataset in model_config.datasets():
-        hparams_file.write(base_hyperparams.nested_struct_to_text(dataset))
-        hparams_file.write('\n\n')
-      for decoder_dataset in model_config.decoder_datasets():
-        hparams_file.write('decoder dataset hparams\n')
-        hparams_file.write(
-            base_hyperparams.nested_struct_to_text(decoder_dataset)
-        )
-        hparams_file.write('\n\n')
-      hparams_file.write(
-          base_hyperparams.nested_struct_to_text(model_config.task()))
+    # Builds the whole file first, as each write may be an RPC on remote paths.
+    parts = []
+    for dataset in model_config.datasets():
+      parts.append(base_hyperparams.nested_struct_to_text(dataset))
+      parts.append('\n\n')
+    for decoder_dataset in model_config.decoder_datasets():
+      parts.append('decoder dataset hparams\n')
+      parts.append(base_hyperparams.nested_struct_to_text(decoder_dataset))
+      parts.append('\n\n')
+    parts.append(base_hyperparams.nested_struct_to_text(model_config.task()))
+    params_fpath.write_text(''.join(parts))
 
 
 def write_experiment_class_vars_file(
@@ -761,62 +874,66 @@ def train_and_evaluate(
       on-demand checkpoint due to preemption.
   """
   jax.monitoring.record_event('/jax/pax/train_and_evaluate/beacon')
-  task_p = experiment_config.task()
-  task_p = typing.cast(pax_fiddle.Config[tasks_lib.SingleTask], task_p)
-
-  # in case the user passed in a string dtype, convert it to an actual dtype
-  task_p.model.fprop_dtype = jnp.dtype(task_p.model.fprop_dtype)
-
-  input_p = experiment_config.datasets()
-  for inp in input_p:
-    if not isinstance(
-        inp, (base_input.BaseInput.HParams, base_input.DistributedInputHParams)
-    ):
+  # Building the configs and the checkpointer allocates many small, mostly
+  # long-lived objects. Collects once afterwards instead of along the way.
+  with _gc_paused():
+    task_p = experiment_config.task()
+    task_p = typing.cast(pax_fiddle.Config[tasks_lib.SingleTask], task_p)
+
+    # in case the user passed in a string dtype, convert it to an actual dtype
+    task_p.model.fprop_dtype = jnp.dtype(task_p.model.fprop_dtype)
+
+    input_p = experiment_config.datasets()
+    for inp in input_p:
+      if not isinstance(
+          inp,
+          (base_input.BaseInput.HParams, base_input.DistributedInputHParams),
+      ):
+        raise ValueError(
+            f'Expecting BaseInput.HParams from datasets(), got: {inp.ToText()}'
+        )
+    train_input_p = [v for v in input_p if v.is_training]
+    if len(train_input_p) != 1:
       raise ValueError(
-          f'Expecting BaseInput.HParams from datasets(), got: {inp.ToText()}'
+          f'Expecting exactly one training split. Got `{len(train_input_p)}`.'
       )
-  train_input_p = [v for v in input_p if v.is_training]
-  if len(train_input_p) != 1:
-    raise ValueError(
-        f'Expecting exactly one training split. Got `{len(train_input_p)}`.'
-    )
-  train_input_p = train_input_p[0]
+    train_input_p = train_input_p[0]
 
-  logging.info('train_input_p:')
-  for line in base_hyperparams.nested_struct_to_text(
-      train_input_p
-  ).splitlines():  # pytype: disable=attribute-error
-    logging.info('  %s', line)
-  logging.info('task_p:')
-  for line in base_hyperparams.nested_struct_to_text(task_p).splitlines():  # pytype: disable=attribute-error
-    logging.info('  %s', line)
+    logging.info('train_input_p:')
+    for line in base_hyperparams.nested_struct_to_text(
+        train_input_p
+    ).splitlines():  # pytype: disable=attribute-error
+      logging.info('  %s', line)
+    logging.info('task_p:')
+    for line in base_hyperparams.nested_struct_to_text(task_p).splitlines():  # pytype: disable=attribute-error
+      logging.info('  %s', line)
 
-  if (
-      run_decode
-      and task_p.train.decode_interval_steps is not None
-      and task_p.train.decode_interval_steps > 0
-  ):
-    decode_input_p = experiment_config.decoder_datasets()
-  else:
-    decode_input_p = []
+    if (
+        run_decode
+        and task_p.train.decode_interval_steps is not None
+        and task_p.train.decode_interval_steps > 0
+    ):
+      decode_input_p = experiment_config.decoder_datasets()
+    else:
+      decode_input_p = []
 
-  checkpoint_type = checkpoint_types.retrieve_checkpoint_type(
-      maybe_use_persistence_checkpointing, task_p
-  )
+    checkpoint_type = checkpoint_types.retrieve_checkpoint_type(
+        maybe_use_persistence_checkpointing, task_p
+    )
 
-  job_log_dir = epath.Path(job_log_dir)
-  checkpointer = _create_checkpointer(
-      task_p,
-      job_log_dir,
-      checkpoint_type,
-      checkpoint_todelete_subdir,
-      train_input_p=train_input_p,
-      enable_async_checkpointing=enable_async_checkpointing,
-      enable_checkpoint_saving=enable_checkpoint_saving,
-      enforce_restore_shape_check=enforce_restore_shape_check,
-      maybe_use_persistence_checkpointing=maybe_use_persistence_checkpointing,
-      tensorstore_use_ocdbt=tensorstore_use_ocdbt,
-  )
+    job_log_dir = epath.Path(job_log_dir)
+    checkpointer = _create_checkpointer(
+        task_p,
+        job_log_dir,
+        checkpoint_type,
+        checkpoint_todelete_subdir,
+        train_input_p=train_input_p,
+        enable_async_checkpointing=enable_async_checkpointing,
+        enable_checkpoint_saving=enable_checkpoint_saving,
+        enforce_restore_shape_check=enforce_restore_shape_check,
+        maybe_use_persistence_checkpointing=maybe_use_persistence_checkpointing,
+        tensorstore_use_ocdbt=tensorstore_use_ocdbt,
+    )
   if not enable_checkpoint_saving:
     logging.info(
         'Checkpointing is disabled and no checkpoint will be saved to disk.'
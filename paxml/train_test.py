@@ -0,0 +1,169 @@
+# coding=utf-8
+# Copyright 2022 The Pax Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for train."""
+
+import datetime
+import os
+from unittest import mock
+
+from absl.testing import absltest
+from absl.testing import parameterized
+from etils import epath
+import jax
+import numpy as np
+from paxml import checkpoint_managers
+from paxml import checkpoint_types
+from paxml import train
+
+CheckpointType = checkpoint_types.CheckpointType
+
+
+def _create_training_checkpointer(
+    use_pmap: bool,
+    checkpoint_manager: checkpoint_managers.OrbaxCheckpointManager,
+    **kwargs,
+):
+  if use_pmap:
+    return train._OrbaxPmapTrainingCheckpointer(  # pylint: disable=protected-access
+        epath.Path('/tmp/job_log_dir'),
+        checkpoint_manager,
+        CheckpointType.FLAX,
+        **kwargs,
+    )
+  return train._OrbaxPjitTrainingCheckpointer(  # pylint: disable=protected-access
+      checkpoint_manager, CheckpointType.GDA, **kwargs
+  )
+
+
+class ParseDurationTest(parameterized.TestCase):
+
+  @parameterized.parameters(
+      ('30', datetime.timedelta(seconds=30)),
+      ('30s', datetime.timedelta(seconds=30)),
+      ('15m', datetime.timedelta(minutes=15)),
+      ('2h', datetime.timedelta(hours=2)),
+      ('1d', datetime.timedelta(days=1)),
+      ('0s', datetime.timedelta(0)),
+      (' 12h\n', datetime.timedelta(hours=12)),
+  )
+  def test_parse_duration(self, duration_str, expected):
+    self.assertEqual(expected, train._parse_duration(duration_str))  # pylint: disable=protected-access
+
+  @parameterized.parameters(None, '')
+  def test_parse_empty_duration(self, duration_str):
+    self.assertIsNone(train._parse_duration(duration_str))  # pylint: disable=protected-access
+
+  @parameterized.parameters(
+      'abc', '10x', 'm', '-5m', '1.5h', '1h30m', '30 s', '30sec', '   '
+  )
+  def test_parse_invalid_duration(self, duration_str):
+    with self.assertRaisesRegex(ValueError, 'Unable to parse string duration'):
+      train._parse_duration(duration_str)  # pylint: disable=protected-access
+
+
+class ShardedGlobalArrayTest(absltest.TestCase):
+
+  def _replicate(self, x):
+    return jax.device_put_replicated(x, jax.local_devices())
+
+  def test_shards_first_divisible_axis(self):
+    num_devices = jax.device_count()
+    self.assertGreater(num_devices, 1)
+    # The first axis is not divisible by the number of devices, the second is.
+    shape = (num_devices + 1, 2 * num_devices)
+    x = np.arange(np.prod(shape), dtype=np.float32).reshape(shape)
+    arr = train._convert_host_local_array_to_sharded_global_array(  # pylint: disable=protected-access
+        self._replicate(x)
+    )
+
+    self.assertEqual(x.shape, arr.shape)
+    self.assertFalse(arr.sharding.is_fully_replicated)
+    device_positions = {d: i for i, d in enumerate(jax.devices())}
+    for shard in arr.addressable_shards:
+      i = device_positions[shard.device]
+      self.assertEqual((slice(None), slice(2 * i, 2 * (i + 1))), shard.index)
+      np.testing.assert_array_equal(x[:, 2 * i : 2 * (i + 1)], shard.data)
+    np.testing.assert_array_equal(x, np.asarray(arr))
+
+  def test_replicates_without_divisible_axis(self):
+    num_devices = jax.device_count()
+    self.assertGreater(num_devices, 1)
+    for x in (
+        np.arange(num_devices + 1, dtype=np.int32),
+        np.array(7.0, dtype=np.float32),
+    ):
+      arr = train._convert_host_local_array_to_sharded_global_array(  # pylint: disable=protected-access
+          self._replicate(x)
+      )
+
+      self.assertEqual(x.shape, arr.shape)
+      self.assertTrue(arr.sharding.is_fully_replicated)
+      for shard in arr.addressable_shards:
+        np.testing.assert_array_equal(x, shard.data)
+      np.testing.assert_array_equal(x, np.asarray(arr))
+
+
+class TrainingCheckpointerTest(parameterized.TestCase):
+
+  def _create_checkpoint_manager(self):
+    checkpoint_manager = mock.create_autospec(
+        checkpoint_managers.OrbaxCheckpointManager, instance=True
+    )
+    checkpoint_manager.latest_step.return_value = None
+    checkpoint_manager.should_save.return_value = True
+    return checkpoint_manager
+
+  @parameterized.parameters(False, True)
+  def test_no_save_when_saving_disabled(self, use_pmap):
+    checkpoint_manager = self._create_checkpoint_manager()
+    checkpointer = _create_training_checkpointer(
+        use_pmap, checkpoint_manager, enable_checkpoint_saving=False
+    )
+
+    self.assertFalse(checkpointer._should_save(100))  # pylint: disable=protected-access
+    checkpointer.save_if_needed(100, mock.sentinel.train_state, None, None)
+    checkpoint_manager.save.assert_not_called()
+
+  @parameterized.parameters(False, True)
+  def test_should_save_follows_checkpoint_manager(self, use_pmap):
+    checkpoint_manager = self._create_checkpoint_manager()
+    checkpointer = _create_training_checkpointer(use_pmap, checkpoint_manager)
+
+    self.assertTrue(checkpointer._should_save(100))  # pylint: disable=protected-access
+    checkpoint_manager.should_save.return_value = False
+    self.assertFalse(checkpointer._should_save(101))  # pylint: disable=protected-access
+
+  @parameterized.parameters(False, True)
+  def test_skip_save_if_busy(self, use_pmap):
+    checkpoint_manager = self._create_checkpoint_manager()
+    checkpoint_manager.reached_preemption.return_value = False
+    checkpoint_manager.save_in_progress.return_value = True
+    checkpointer = _create_training_checkpointer(
+        use_pmap, checkpoint_manager, skip_save_if_busy=True
+    )
+
+    self.assertTrue(checkpointer._should_skip_save(100))  # pylint: disable=protected-access
+    checkpoint_manager.save_in_progress.return_value = False
+    self.assertFalse(checkpointer._should_skip_save(101))  # pylint: disable=protected-access
+    # Saves on preemption are never skipped.
+    checkpoint_manager.save_in_progress.return_value = True
+    checkpoint_manager.reached_preemption.return_value = True
+    self.assertFalse(checkpointer._should_skip_save(102))  # pylint: disable=protected-access
+
+
+if __name__ == '__main__':
+  os.environ['XLA_FLAGS'] = '--xla_force_host_platform_device_count=2'
+  absltest.main()